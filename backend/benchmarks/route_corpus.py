@@ -0,0 +1,96 @@
+# backend/benchmarks/route_corpus.py
+"""
+Reproducible synthetic route-optimization instances.
+
+Every instance is a city-like cloud of stops around a depot somewhere inside
+the DIGIPIN bounding box, generated from its own seed. The corpus covers 10
+to 10,000 stops, different fleet sizes and loose to tight time windows, and
+uses the request options the API would need at each size.
+"""
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services.route_optimizer import SHIFT_MINUTES
+from utils.digipin import BOUNDS, encode_many
+
+# Width of the time windows, in minutes, by tightness
+WINDOW_MINUTES = {"loose": SHIFT_MINUTES, "medium": 180, "tight": 60}
+
+# Stops spread over about this many degrees times sqrt(stops), so larger
+# instances cover a larger area at a similar density
+SPREAD_DEGREES = 0.01
+
+
+@dataclass(frozen=True)
+class RouteInstance:
+    name: str
+    stops: int
+    vehicles: int
+    tightness: str
+    seed: int
+    options: dict = field(default_factory=dict)
+
+    def request(self) -> OptimizeRouteRequest:
+        """Build the instance's request; the same instance always gives the same request."""
+        rng = np.random.default_rng(self.seed)
+        spread = SPREAD_DEGREES * math.sqrt(self.stops)
+        center_lat = rng.uniform(BOUNDS["minLat"] + spread, BOUNDS["maxLat"] - spread)
+        center_lon = rng.uniform(BOUNDS["minLon"] + spread, BOUNDS["maxLon"] - spread)
+        lats = np.concatenate([[center_lat], center_lat + rng.normal(0, spread / 2, self.stops)])
+        lons = np.concatenate([[center_lon], center_lon + rng.normal(0, spread / 2, self.stops)])
+        lats = np.clip(lats, BOUNDS["minLat"], BOUNDS["maxLat"])
+        lons = np.clip(lons, BOUNDS["minLon"], BOUNDS["maxLon"])
+        codes, _ = encode_many(lats, lons)
+
+        width = WINDOW_MINUTES[self.tightness]
+        starts = rng.integers(0, SHIFT_MINUTES - width + 1, self.stops)
+        priorities = rng.integers(1, 4, self.stops)
+        return OptimizeRouteRequest(
+            depot=codes[0],
+            vehicles=self.vehicles,
+            locations=[
+                {"digipin": code, "priority": priority, "time_window": [start, start + width]}
+                for code, priority, start in zip(codes[1:].tolist(), priorities.tolist(), starts.tolist())
+            ],
+            **self.options
+        )
+
+
+def _solver(seconds: int) -> dict:
+    return {"solver": {"time_limit_seconds": seconds, "plateau_seconds": 2}}
+
+
+CORPUS = [
+    RouteInstance("tiny-10-loose", 10, 1, "loose", 1, _solver(5)),
+    RouteInstance("small-50-medium", 50, 3, "medium", 2, _solver(10)),
+    RouteInstance("small-100-tight", 100, 8, "tight", 3, _solver(10)),
+    RouteInstance("medium-250-loose", 250, 10, "loose", 4, _solver(20)),
+    RouteInstance("medium-500-medium", 500, 25, "medium", 5, _solver(30)),
+    RouteInstance("large-1000-tight", 1000, 80, "tight", 6, {"arc_model": "sparse", **_solver(30)}),
+    RouteInstance("large-2000-loose", 2000, 60, "loose", 7, {"arc_model": "sparse", **_solver(45)}),
+    RouteInstance("xl-5000-medium", 5000, 200, "medium", 8, {"arc_model": "sparse", "neighbors": 20, **_solver(60)}),
+    RouteInstance(
+        "xl-10000-loose", 10000, 300, "loose", 9,
+        {"decomposition": "kmeans", "cluster_size": 500, **_solver(10)}
+    ),
+]
+
+
+def select_instances(max_stops: int = None, names: list = None) -> list:
+    """Corpus instances up to `max_stops` stops, optionally only those named."""
+    return [
+        instance for instance in CORPUS
+        if (max_stops is None or instance.stops <= max_stops) and (not names or instance.name in names)
+    ]
+
+
+def write_corpus(directory: Path, instances: list = CORPUS):
+    """Write every instance as an /api/optimize-route request body, `<name>.json`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for instance in instances:
+        (directory / f"{instance.name}.json").write_text(instance.request().model_dump_json(indent=2) + "\n")
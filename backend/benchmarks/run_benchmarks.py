@@ -0,0 +1,170 @@
+# backend/benchmarks/run_benchmarks.py
+"""
+Throughput benchmarks for the DIGIPIN codec and its HTTP endpoints.
+
+Run from backend/:
+
+    python -m benchmarks.run_benchmarks                    # compare with baseline
+    python -m benchmarks.run_benchmarks --update-baseline  # record a new baseline
+
+Results are written as JSON (items per second per benchmark). The run exits
+with status 1 when any benchmark is slower than the baseline by more than
+`--threshold` (a fraction, default 0.25). Baselines are machine specific;
+record one on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.digipin import (
+    get_digipin, get_lat_lng_from_digipin, encode_many, decode_many,
+    encode_int, decode_int, get_digipin_neighbors, get_digipin_k_ring,
+)
+from utils.digipin_cover import cover_bbox, cover_polygon
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARK_DIR / "results.json"
+
+
+def measure(func, items: int, min_time: float = 0.2, repeat: int = 3) -> float:
+    """Best-of-`repeat` throughput of `func` in items per second."""
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, calls * items / elapsed)
+    return best
+
+
+def codec_benchmarks(seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(8, 37, 100_000)
+    lons = rng.uniform(68, 98, 100_000)
+    codes, _ = encode_many(lats, lons)
+    scalar_points = list(zip(lats[:1000].tolist(), lons[:1000].tolist()))
+    scalar_codes = codes[:1000].tolist()
+    packed = [encode_int(lat, lon) for lat, lon in scalar_points]
+
+    def loop(func, args):
+        return lambda: [func(*a) for a in args]
+
+    return {
+        "scalar_encode": measure(loop(get_digipin, scalar_points), len(scalar_points)),
+        "scalar_decode": measure(loop(get_lat_lng_from_digipin, [(c,) for c in scalar_codes]), len(scalar_codes)),
+        "int_encode": measure(loop(encode_int, scalar_points), len(scalar_points)),
+        "int_decode": measure(loop(decode_int, [(v,) for v in packed]), len(packed)),
+        "batch_encode": measure(lambda: encode_many(lats, lons), len(lats)),
+        "batch_decode": measure(lambda: decode_many(codes), len(codes)),
+        "neighbors": measure(loop(get_digipin_neighbors, [(c,) for c in scalar_codes]), len(scalar_codes)),
+        "k_ring_2": measure(loop(lambda c: get_digipin_k_ring(c, 2), [(c,) for c in scalar_codes[:200]]), 200),
+        "cover_bbox": measure(lambda: cover_bbox(17.3, 78.3, 17.5, 78.6, max_cells=64), 1),
+        "cover_polygon": measure(
+            lambda: cover_polygon([(17.3, 78.3), (17.6, 78.45), (17.3, 78.6)], max_cells=64), 1
+        ),
+    }
+
+
+def http_benchmarks(seed: int = 0) -> dict:
+    """Endpoint throughput through httpx.ASGITransport (no network, no server)."""
+    import httpx
+    from main import app
+
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(8, 37, 1000)
+    lons = rng.uniform(68, 98, 1000)
+    codes, _ = encode_many(lats, lons)
+    points = [{"lat": lat, "lng": lon} for lat, lon in zip(lats.tolist(), lons.tolist())]
+    ndjson = "".join(json.dumps(point) + "\n" for point in points)
+
+    async def run() -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def timed(make_request, items, min_time=0.5):
+                calls = 0
+                start = time.perf_counter()
+                while time.perf_counter() - start < min_time:
+                    response = await make_request()
+                    response.raise_for_status()
+                    calls += 1
+                return calls * items / (time.perf_counter() - start)
+
+            return {
+                "http_encode": await timed(
+                    lambda: client.get("/api/digipin", params={"lat": 17.385, "lng": 78.4867}), 1
+                ),
+                "http_decode": await timed(
+                    lambda: client.get("/api/latlng", params={"digipin": "4FK-PC3-M5P6"}), 1
+                ),
+                "http_batch_encode": await timed(
+                    lambda: client.post("/api/digipin/batch", json={"points": points}), len(points)
+                ),
+                "http_batch_decode": await timed(
+                    lambda: client.post("/api/latlng/batch", json={"digipins": codes.tolist()}), len(codes)
+                ),
+                "http_stream_encode": await timed(
+                    lambda: client.post("/api/digipin/stream", content=ndjson), len(points)
+                ),
+            }
+
+    return asyncio.run(run())
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return `(name, baseline, current, change)` for every benchmark that regressed."""
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None or base <= 0:
+            continue
+        change = current / base - 1
+        if change < -threshold:
+            regressions.append((name, base, current, change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed throughput drop as a fraction of the baseline")
+    parser.add_argument("--skip-http", action="store_true", help="only run the in-process codec benchmarks")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to the baseline file")
+    args = parser.parse_args(argv)
+
+    results = codec_benchmarks()
+    if not args.skip_http:
+        results.update(http_benchmarks())
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    print(f"{'benchmark':<22}{'items/s':>14}{'baseline':>14}{'change':>9}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        change = f"{value / base - 1:+.1%}" if base else "-"
+        print(f"{name:<22}{value:>14,.0f}{(base or 0):>14,.0f}{change:>9}")
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, change in regressions:
+        print(f"REGRESSION {name}: {current:,.0f}/s vs baseline {base:,.0f}/s ({change:+.1%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
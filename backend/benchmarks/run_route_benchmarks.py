@@ -0,0 +1,146 @@
+# backend/benchmarks/run_route_benchmarks.py
+"""
+Quality and speed benchmarks for route optimization over the synthetic
+corpus in `benchmarks.route_corpus`.
+
+Run from backend/:
+
+    python -m benchmarks.run_route_benchmarks                    # compare with baseline
+    python -m benchmarks.run_route_benchmarks --max-stops 500    # only the smaller instances
+    python -m benchmarks.run_route_benchmarks --update-baseline  # record a new baseline
+    python -m benchmarks.run_route_benchmarks --write-corpus DIR # save the instances as request JSON
+
+Every instance is solved in a fresh process, the same way a solver pool
+process would (decomposed instances solve their clusters one after
+another). Per instance the run records the solve time, the time to the
+first solution, the final objective, the number of dropped stops and the
+peak memory of the process. It exits with status 1 when an instance got
+slower or used more memory by more than `--threshold`, when its objective
+got worse by more than `--objective-threshold`, or when it dropped more
+stops than in the baseline. Baselines are machine specific; record one on
+the machine that runs the comparison.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.route_corpus import select_instances, write_corpus
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "route_baseline.json"
+DEFAULT_OUTPUT = BENCHMARK_DIR / "route_results.json"
+
+# Solve times below this many seconds are too noisy to flag
+MIN_FLAGGED_SECONDS = 0.5
+
+
+def run_instance(instance) -> dict:
+    """Solve one instance in this process and measure it."""
+    from services.route_decomposition import solve_decomposed
+    from services.route_optimizer import solve_route
+
+    req = instance.request()
+    solutions = []
+    start = time.perf_counter()
+
+    def record(response, objective):
+        solutions.append((time.perf_counter() - start, objective))
+
+    if req.decomposition is not None:
+        response = solve_decomposed(req, on_solution=record)
+    else:
+        response = solve_route(req, on_solution=record)
+    seconds = time.perf_counter() - start
+    return {
+        "stops": instance.stops,
+        "vehicles": instance.vehicles,
+        "seconds": round(seconds, 3),
+        "first_solution_seconds": round(solutions[0][0], 3) if solutions else None,
+        "objective": solutions[-1][1] if solutions else None,
+        "routes": len(response.routes),
+        "dropped": len(response.dropped),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_corpus(instances: list) -> dict:
+    """Results by instance name, each instance in a fresh spawned process."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for instance in instances:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[instance.name] = executor.submit(run_instance, instance).result()
+        print(f"{instance.name}: {results[instance.name]}", flush=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, objective_threshold: float) -> list:
+    """Return `(instance, metric, baseline, current)` for every regression."""
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["seconds"] > max(base["seconds"] * (1 + threshold), base["seconds"] + MIN_FLAGGED_SECONDS):
+            regressions.append((name, "seconds", base["seconds"], current["seconds"]))
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append((name, "peak_rss_mb", base["peak_rss_mb"], current["peak_rss_mb"]))
+        if base["objective"] is not None and (
+            current["objective"] is None or current["objective"] > base["objective"] * (1 + objective_threshold)
+        ):
+            regressions.append((name, "objective", base["objective"], current["objective"]))
+        if current["dropped"] > base["dropped"]:
+            regressions.append((name, "dropped", base["dropped"], current["dropped"]))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed solve time and memory increase as a fraction of the baseline")
+    parser.add_argument("--objective-threshold", type=float, default=0.02,
+                        help="allowed objective increase as a fraction of the baseline")
+    parser.add_argument("--max-stops", type=int, help="skip instances with more stops")
+    parser.add_argument("--instance", action="append", help="only run this instance (repeatable)")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--write-corpus", type=Path, metavar="DIR", help="write the instances as JSON and exit")
+    args = parser.parse_args(argv)
+
+    instances = select_instances(args.max_stops, args.instance)
+    if args.write_corpus:
+        write_corpus(args.write_corpus, instances)
+        return 0
+
+    results = run_corpus(instances)
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    print(f"{'instance':<22}{'seconds':>9}{'first':>8}{'objective':>14}{'dropped':>9}{'MB':>8}{'vs baseline':>13}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['seconds'] / base['seconds'] - 1:+.1%}" if base and base["seconds"] else "-"
+        print(
+            f"{name:<22}{result['seconds']:>9.2f}{result['first_solution_seconds'] or 0:>8.2f}"
+            f"{result['objective'] or 0:>14,}{result['dropped']:>9}{result['peak_rss_mb']:>8.0f}{change:>13}"
+        )
+
+    regressions = compare(results, baseline, args.threshold, args.objective_threshold)
+    for name, metric, base, current in regressions:
+        print(f"REGRESSION {name} {metric}: {current} vs baseline {base}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,4 +7,57 @@ load_dotenv()
 SECRET = os.getenv("SECRET")
 DATABASE_URL = os.getenv("DATABASE_URL")
 JWT_LIFETIME_SECONDS = int(os.getenv("JWT_LIFETIME_SECONDS", 3600))
-DIGIPIN_API_BASE = os.getenv("DIGIPIN_API_BASE", "http://localhost:5000")
\ No newline at end of file
+DIGIPIN_API_BASE = os.getenv("DIGIPIN_API_BASE", "http://localhost:5000")
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+
+# Maximum number of items accepted by the batch encode/decode endpoints
+DIGIPIN_BATCH_MAX_ITEMS = int(os.getenv("DIGIPIN_BATCH_MAX_ITEMS", 10000))
+
+# Number of lines converted per chunk by the streaming encode/decode endpoints
+DIGIPIN_STREAM_CHUNK_LINES = int(os.getenv("DIGIPIN_STREAM_CHUNK_LINES", 5000))
+
+# Longest input line accepted by the streaming endpoints; longer lines get an error row
+DIGIPIN_STREAM_MAX_LINE_BYTES = int(os.getenv("DIGIPIN_STREAM_MAX_LINE_BYTES", 1024))
+
+# Route solver process pool: concurrent solves, and extra requests allowed to wait
+SOLVER_POOL_SIZE = int(os.getenv("SOLVER_POOL_SIZE", max(1, (os.cpu_count() or 2) - 1)))
+SOLVER_QUEUE_DEPTH = int(os.getenv("SOLVER_QUEUE_DEPTH", 8))
+
+# SQLite file holding asynchronous route-optimization jobs
+ROUTE_JOBS_DB = os.getenv("ROUTE_JOBS_DB", "route_jobs.sqlite3")
+
+# Longest search a route request may ask for: on /api/optimize-route, and as a background job
+ROUTE_MAX_TIME_LIMIT_SECONDS = int(os.getenv("ROUTE_MAX_TIME_LIMIT_SECONDS", 60))
+ROUTE_JOB_MAX_TIME_LIMIT_SECONDS = int(os.getenv("ROUTE_JOB_MAX_TIME_LIMIT_SECONDS", 1800))
+
+# How often the route job event stream checks for a better solution, in seconds
+ROUTE_JOB_EVENT_POLL_SECONDS = float(os.getenv("ROUTE_JOB_EVENT_POLL_SECONDS", 0.5))
+
+# Cache of solved /api/optimize-route results: entries, lifetime, and an optional SQLite file to keep them across restarts
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", 256))
+ROUTE_CACHE_TTL_SECONDS = int(os.getenv("ROUTE_CACHE_TTL_SECONDS", 3600))
+ROUTE_CACHE_DB = os.getenv("ROUTE_CACHE_DB")
+
+# Pairwise route distance cache, per solver process: pairs kept in memory, an optional SQLite file shared
+# across processes and restarts, and the largest dense request (in stops, depot included) that uses it
+ROUTE_DISTANCE_CACHE_SIZE = int(os.getenv("ROUTE_DISTANCE_CACHE_SIZE", 250000))
+ROUTE_DISTANCE_CACHE_DB = os.getenv("ROUTE_DISTANCE_CACHE_DB")
+ROUTE_DISTANCE_CACHE_MAX_STOPS = int(os.getenv("ROUTE_DISTANCE_CACHE_MAX_STOPS", 200))
+
+# OSRM-compatible routing engine for the "osrm" distance provider: base URL (unset disables the provider),
+# profile, stops per side of each table request, concurrent requests, retries and per-request timeout
+ROUTE_OSRM_URL = os.getenv("ROUTE_OSRM_URL")
+ROUTE_OSRM_PROFILE = os.getenv("ROUTE_OSRM_PROFILE", "driving")
+ROUTE_OSRM_TILE_SIZE = int(os.getenv("ROUTE_OSRM_TILE_SIZE", 100))
+ROUTE_OSRM_CONCURRENCY = int(os.getenv("ROUTE_OSRM_CONCURRENCY", 4))
+ROUTE_OSRM_RETRIES = int(os.getenv("ROUTE_OSRM_RETRIES", 3))
+ROUTE_OSRM_TIMEOUT_SECONDS = float(os.getenv("ROUTE_OSRM_TIMEOUT_SECONDS", 10))
+
+# Shared outgoing HTTP client (reverse geocoding): timeouts, pool limits, idle connection lifetime, and
+# opt-in HTTP/2, which needs the `h2` package (pip install "httpx[http2]")
+HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS", 5))
+HTTP_CLIENT_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_CLIENT_READ_TIMEOUT_SECONDS", 10))
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", 20))
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS", 10))
+HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS", 30))
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() in ("1", "true", "yes")
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from uuid import UUID
 
 from fastapi import FastAPI, Depends, Request
@@ -18,14 +19,26 @@ from fastapi_users import FastAPIUsers
 from routes import proof
 from routes.admin import router as admin_router
 from routes.events import router as event_router
+from services.solver_pool import shutdown_solver_pool
+from services.http_client import get_http_client, close_http_client
+from services.route_jobs import resume_orphaned_route_jobs
 # Initialize FastAPI Users
 fastapi_users = FastAPIUsers[User, UUID](
     get_user_manager,
     [auth_backend],
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    resume_orphaned_route_jobs()
+    yield
+    await close_http_client()
+    shutdown_solver_pool()
+
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Rate limiter setup
 limiter = Limiter(key_func=get_remote_address)
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from dependencies import get_current_admin_user
 from database import get_async_session
 from models import User
+from services.http_client import http_client_stats
 from sqlalchemy.future import select
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -14,3 +15,9 @@ async def list_all_users(
 ):
     result = await session.execute(select(User))
     return result.scalars().all()
+
+
+@router.get("/http-client")
+async def get_http_client_stats(_: User = Depends(get_current_admin_user)):
+    """Connection pool limits and usage of the shared outgoing HTTP client."""
+    return http_client_stats()
@@ -1,18 +1,201 @@
+import asyncio
+import csv
+import io
+import json
+import math
+from datetime import datetime, timezone
+from tempfile import SpooledTemporaryFile
+from typing import Literal
 import httpx
-from fastapi import APIRouter, Query, HTTPException, Depends
+import numpy as np
+from fastapi import APIRouter, Query, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
-from ortools.constraint_solver import routing_enums_pb2, pywrapcp
-from schemas.digipin_schemas import OptimizeRouteResponse,OptimizeRouteRequest,OptimizedRoute,RouteLocation
+from schemas.digipin_schemas import OptimizeRouteResponse,OptimizeRouteRequest
 
 from schemas.digipin_schemas import (
-    EncodeDigipinResponse, DecodeDigipinResponse, AddressResponse
+    EncodeDigipinResponse, DecodeDigipinResponse, AddressResponse,
+    BatchEncodeRequest, BatchEncodeResponse, BatchDecodeRequest, BatchDecodeResponse,
+    RouteJobCreated, RouteJobResponse, ReoptimizeRouteRequest, MultiDepotRouteRequest, MultiDepotRouteResponse
 )
 from services.service_area_service import is_within_service_area
+from services.http_client import get_http_client
+from services.route_optimizer import solve_route, apply_route_diff, RouteOptimizationError
+from services.solver_pool import get_solver_pool, SolverPoolFullError
+from services.route_cache import get_route_cache
+from services.route_decomposition import solve_decomposed_in_pool
+from services.route_depots import solve_depots_in_pool
+from services.route_jobs import get_route_job_store, submit_route_job, JOB_FAILED, ACTIVE_JOB_STATUSES
 from database import get_db
-from utils.digipin import is_valid_digipin,get_digipin,get_lat_lng_from_digipin,haversine
+from config import (
+    DIGIPIN_STREAM_CHUNK_LINES, DIGIPIN_STREAM_MAX_LINE_BYTES, ROUTE_MAX_TIME_LIMIT_SECONDS,
+    ROUTE_JOB_EVENT_POLL_SECONDS, NOMINATIM_URL
+)
+from utils.digipin import is_valid_digipin,get_digipin,get_lat_lng_from_digipin,encode_many,decode_many
 
 router = APIRouter()
 
+INVALID_DIGIPIN_DETAIL = "Invalid DIGIPIN: must be exactly 10 characters using only F,C,J,K,L,M,P,T and digits 2-9"
+
+
+def encode_batch(lats: np.ndarray, lngs: np.ndarray) -> list:
+    """Encode coordinate arrays, returning one `digipin` or `error` dict per row."""
+    lat_ok = (lats >= 8) & (lats <= 37)
+    lng_ok = (lngs >= 68) & (lngs <= 98)
+    codes, valid = encode_many(lats, lngs)
+    valid &= lat_ok & lng_ok
+
+    results = []
+    for code, ok, lat_in_range in zip(codes.tolist(), valid.tolist(), lat_ok.tolist()):
+        if ok:
+            results.append({"digipin": code})
+        elif not lat_in_range:
+            results.append({"error": "Latitude out of range"})
+        else:
+            results.append({"error": "Longitude out of range"})
+    return results
+
+
+def decode_batch(digipins: list) -> list:
+    """Decode DIGIPIN codes, returning one coordinates or `error` dict per row."""
+    lats, lngs, valid = decode_many(digipins)
+
+    results = []
+    for lat, lng, ok in zip(lats.tolist(), lngs.tolist(), valid.tolist()):
+        if ok:
+            results.append({"latitude": lat, "longitude": lng})
+        else:
+            results.append({"error": INVALID_DIGIPIN_DETAIL})
+    return results
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Bodies up to this size are spooled in memory, larger ones roll over to disk
+STREAM_SPOOL_MEMORY_BYTES = 1024 * 1024
+# Marker for an input line longer than DIGIPIN_STREAM_MAX_LINE_BYTES
+LINE_TOO_LONG = object()
+
+
+async def spool_request_body(request: Request) -> SpooledTemporaryFile:
+    """
+    Copy the request body into a spooled temporary file before the response
+    starts. Once a StreamingResponse is running, Starlette listens for the
+    client disconnect on the same `receive` channel, so the body has to be
+    consumed up front rather than from inside the response iterator.
+    """
+    spool = SpooledTemporaryFile(max_size=STREAM_SPOOL_MEMORY_BYTES)
+    async for data in request.stream():
+        spool.write(data)
+    spool.seek(0)
+    return spool
+
+
+def read_line_chunk(spool: SpooledTemporaryFile, size: int) -> list:
+    """
+    Read up to `size` non-empty lines from the spooled body. A line longer
+    than DIGIPIN_STREAM_MAX_LINE_BYTES is skipped in bounded reads and
+    returned as LINE_TOO_LONG, so no single line is ever held in full.
+    """
+    limit = DIGIPIN_STREAM_MAX_LINE_BYTES
+    lines = []
+    while len(lines) < size:
+        line = spool.readline(limit + 1)
+        if not line:
+            break
+        if len(line) > limit and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = spool.readline(limit + 1)
+            lines.append(LINE_TOO_LONG)
+            continue
+        line = line.strip()
+        if line:
+            lines.append(line.decode("utf-8", errors="replace"))
+    return lines
+
+
+def parse_encode_line(line: str, fmt: str) -> dict:
+    if fmt == "csv":
+        lat, lng = next(csv.reader([line]))
+    else:
+        item = json.loads(line)
+        lat, lng = item["lat"], item["lng"]
+    lat, lng = float(lat), float(lng)
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        raise ValueError("lat and lng must be finite numbers")
+    return {"lat": lat, "lng": lng}
+
+
+def parse_decode_line(line: str, fmt: str) -> dict:
+    if fmt == "csv":
+        digipin = next(csv.reader([line]))[0]
+    else:
+        digipin = json.loads(line)["digipin"]
+    if not isinstance(digipin, str):
+        raise ValueError("digipin must be a string")
+    return {"digipin": digipin.strip()}
+
+
+def encode_chunk(rows: list) -> list:
+    lats = np.fromiter((row["lat"] for row in rows), dtype=np.float64, count=len(rows))
+    lngs = np.fromiter((row["lng"] for row in rows), dtype=np.float64, count=len(rows))
+    return encode_batch(lats, lngs)
+
+
+def decode_chunk(rows: list) -> list:
+    return decode_batch([row["digipin"] for row in rows])
+
+
+def is_csv_header(line, fmt: str) -> bool:
+    if fmt != "csv" or not isinstance(line, str):
+        return False
+    first = next(csv.reader([line]), [""])[0].strip().lower()
+    return first in ("lat", "latitude", "digipin")
+
+
+async def stream_results(spool: SpooledTemporaryFile, fmt: str, parse_line, run_chunk, columns: list):
+    """
+    Parse, convert and serialize the spooled body one chunk of lines at a time,
+    so memory use is bounded by DIGIPIN_STREAM_CHUNK_LINES rather than body size.
+    Lines that cannot be parsed produce an `error` row in their position.
+    """
+    if fmt == "csv":
+        yield ",".join(columns) + "\n"
+
+    first_chunk = True
+    while True:
+        lines = await run_in_threadpool(read_line_chunk, spool, DIGIPIN_STREAM_CHUNK_LINES)
+        if not lines:
+            break
+        if first_chunk:
+            first_chunk = False
+            if is_csv_header(lines[0], fmt):
+                lines = lines[1:]
+
+        rows = []
+        for line in lines:
+            if line is LINE_TOO_LONG:
+                rows.append({"error": "Line too long"})
+                continue
+            try:
+                rows.append(parse_line(line, fmt))
+            except (ValueError, KeyError, TypeError, IndexError, OverflowError, StopIteration):
+                rows.append({"error": "Invalid input line"})
+
+        parsed = [row for row in rows if "error" not in row]
+        converted = iter(run_chunk(parsed) if parsed else [])
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for row in rows:
+            result = row if "error" in row else {**row, **next(converted)}
+            if fmt == "csv":
+                writer.writerow([result.get(column, "") for column in columns])
+            else:
+                out.write(json.dumps(result) + "\n")
+        yield out.getvalue()
+
+
 @router.get("/api/digipin", response_model=EncodeDigipinResponse, tags=["DIGIPIN"])
 async def get_digipin_by_lat_lng(
     lat: float = Query(..., ge=8, le=37, description="Latitude value (8 to 37 degrees)"),
@@ -48,10 +231,7 @@ async def get_latlng(
     """
     clean_digipin = digipin.replace("-", "")
     if not is_valid_digipin(clean_digipin):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid DIGIPIN: must be exactly 10 characters using only F,C,J,K,L,M,P,T and digits 2-9"
-        )
+        raise HTTPException(status_code=400, detail=INVALID_DIGIPIN_DETAIL)
     
     try:
         result = get_lat_lng_from_digipin(clean_digipin)
@@ -60,6 +240,70 @@ async def get_latlng(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/api/digipin/batch", response_model=BatchEncodeResponse, tags=["DIGIPIN"])
+async def get_digipins_batch(req: BatchEncodeRequest):
+    """
+    Generate DIGIPIN codes for many coordinates in one request.
+
+    - **points**: List of `{"lat": ..., "lng": ...}` objects (same ranges as `/api/digipin`)
+    - **Returns**: One result per point, in input order, with either `digipin` or `error` set
+    """
+    lats = np.fromiter((p.lat for p in req.points), dtype=np.float64, count=len(req.points))
+    lngs = np.fromiter((p.lng for p in req.points), dtype=np.float64, count=len(req.points))
+    return {"results": encode_batch(lats, lngs)}
+
+
+@router.post("/api/latlng/batch", response_model=BatchDecodeResponse, tags=["DIGIPIN"])
+async def get_latlngs_batch(req: BatchDecodeRequest):
+    """
+    Decode many DIGIPIN codes in one request.
+
+    - **digipins**: List of DIGIPIN codes (hyphens optional)
+    - **Returns**: One result per code, in input order, with either coordinates or `error` set
+    """
+    return {"results": decode_batch(req.digipins)}
+
+
+@router.post("/api/digipin/stream", tags=["DIGIPIN"])
+async def stream_digipins(
+    request: Request,
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+):
+    """
+    Encode a streamed CSV or NDJSON body of coordinates into DIGIPIN codes.
+
+    - **ndjson**: One `{"lat": ..., "lng": ...}` object per line
+    - **csv**: `lat,lng` rows, with an optional header row
+    - **Returns**: A chunked response with one result line per input line, in input order
+    """
+    spool = await spool_request_body(request)
+    return StreamingResponse(
+        stream_results(spool, fmt, parse_encode_line, encode_chunk, ["lat", "lng", "digipin", "error"]),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        background=BackgroundTask(spool.close)
+    )
+
+
+@router.post("/api/latlng/stream", tags=["DIGIPIN"])
+async def stream_latlngs(
+    request: Request,
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+):
+    """
+    Decode a streamed CSV or NDJSON body of DIGIPIN codes into coordinates.
+
+    - **ndjson**: One `{"digipin": ...}` object per line
+    - **csv**: One DIGIPIN per row, with an optional header row
+    - **Returns**: A chunked response with one result line per input line, in input order
+    """
+    spool = await spool_request_body(request)
+    return StreamingResponse(
+        stream_results(spool, fmt, parse_decode_line, decode_chunk, ["digipin", "latitude", "longitude", "error"]),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        background=BackgroundTask(spool.close)
+    )
+
+
 @router.get("/api/address", response_model=AddressResponse, tags=["DIGIPIN"])
 async def get_address_from_digipin(
     digipin: str = Query(..., description="DIGIPIN code to be decoded into address")
@@ -69,6 +313,9 @@ async def get_address_from_digipin(
 
     - **digipin**: A valid 10-character DIGIPIN
     - **Returns**: Address fields including full address, city, state, country, and pincode
+
+    Uses the app-wide pooled HTTP client; returns 504 when Nominatim times
+    out and 502 when it fails.
     """
     clean_digipin = digipin.replace("-", "")
     if not is_valid_digipin(clean_digipin):
@@ -76,31 +323,33 @@ async def get_address_from_digipin(
 
     coords = get_lat_lng_from_digipin(clean_digipin)
     lat, lng = coords["latitude"], coords["longitude"]
-    async with httpx.AsyncClient() as client:       
-
-        reverse_res = await client.get(
-            "https://nominatim.openstreetmap.org/reverse",
+    try:
+        reverse_res = await get_http_client().get(
+            f"{NOMINATIM_URL}/reverse",
             params={
                 "lat": lat,
                 "lon": lng,
                 "format": "json",
                 "addressdetails": 1,
-            },
-            headers={"User-Agent": "digipin-app"}
+            }
         )
         reverse_res.raise_for_status()
-        data = reverse_res.json()
-        address = data.get("address", {})
-
-        return {
-            "latitude": lat,
-            "longitude": lng,
-            "full_address": data.get("display_name"),
-            "pincode": address.get("postcode"),
-            "city": address.get("city") or address.get("town") or address.get("village"),
-            "state": address.get("state"),
-            "country": address.get("country"),
-        }
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Reverse geocoding timed out")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Reverse geocoding failed: {e}")
+    data = reverse_res.json()
+    address = data.get("address", {})
+
+    return {
+        "latitude": lat,
+        "longitude": lng,
+        "full_address": data.get("display_name"),
+        "pincode": address.get("postcode"),
+        "city": address.get("city") or address.get("town") or address.get("village"),
+        "state": address.get("state"),
+        "country": address.get("country"),
+    }
 
 @router.get("/api/digipin/validate", tags=["DIGIPIN"])
 async def validate_digipin_service_area(
@@ -109,7 +358,7 @@ async def validate_digipin_service_area(
 ):
     clean_digipin = digipin.replace("-", "")
     if not is_valid_digipin(clean_digipin):
-        raise HTTPException(status_code=400,detail="Invalid DIGIPIN: must be exactly 10 characters using only F,C,J,K,L,M,P,T and digits 2-9")
+        raise HTTPException(status_code=400,detail=INVALID_DIGIPIN_DETAIL)
     coords = get_lat_lng_from_digipin(clean_digipin)
     is_valid = await is_within_service_area(db, coords["latitude"], coords["longitude"])
     return {
@@ -121,127 +370,174 @@ async def validate_digipin_service_area(
 
 @router.post("/api/optimize-route", response_model=OptimizeRouteResponse, tags=["DIGIPIN"])
 async def optimize_route(req: OptimizeRouteRequest):
-    all_points = [RouteLocation(digipin=req.depot, priority=1, time_window=(0, 9999))] + req.locations
+    """
+    Optimize multi-vehicle routes over DIGIPIN locations.
+
+    The solve runs in the shared solver process pool, so it does not block
+    other requests on this worker. Returns 503 when the pool queue is full.
+    With `decomposition` set, the stop clusters are solved in parallel.
+    `solver.time_limit_seconds` is capped at ROUTE_MAX_TIME_LIMIT_SECONDS
+    here; submit a job for longer searches. Repeated requests are served
+    from the route result cache, with `cache_hit` set.
+    """
+    if req.solver.time_limit_seconds > ROUTE_MAX_TIME_LIMIT_SECONDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"solver.time_limit_seconds may be at most {ROUTE_MAX_TIME_LIMIT_SECONDS} here; "
+                   "use /api/optimize-route/jobs for longer searches"
+        )
+
+    async def solve():
+        if req.decomposition is not None:
+            return await solve_decomposed_in_pool(get_solver_pool(), req)
+        return await get_solver_pool().run(solve_route, req)
 
     try:
-        coords = [get_lat_lng_from_digipin(loc.digipin) for loc in all_points]
-    except ValueError as e:
+        return await get_route_cache().get_or_solve(req, solve)
+    except SolverPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RouteOptimizationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/api/optimize-route/multi-depot", response_model=MultiDepotRouteResponse, tags=["DIGIPIN"])
+async def optimize_multi_depot_route(req: MultiDepotRouteRequest):
+    """
+    Optimize routes for several depots at once.
+
+    Each depot has its own vehicles and stops; shared `locations` go to
+    their nearest depot. The depots are then solved independently and in
+    parallel on the solver pool, and the routes are merged with vehicles
+    numbered across depots. Per-depot solve times come back in `depots`.
+    Same time limit and errors as /api/optimize-route.
+    """
+    if req.solver.time_limit_seconds > ROUTE_MAX_TIME_LIMIT_SECONDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"solver.time_limit_seconds may be at most {ROUTE_MAX_TIME_LIMIT_SECONDS} here"
+        )
+    try:
+        return await solve_depots_in_pool(get_solver_pool(), req)
+    except SolverPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RouteOptimizationError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    distance_matrix = [[int(haversine(p1['latitude'], p1['longitude'], p2['latitude'], p2['longitude']))
-                        for p2 in coords] for p1 in coords]
-
-    manager = pywrapcp.RoutingIndexManager(len(distance_matrix), req.vehicles, 0)
-    routing = pywrapcp.RoutingModel(manager)
-
-    def distance_callback(from_index, to_index):
-        """Returns the distance between the two nodes."""
-        return distance_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-    # --- START MODIFICATIONS ---
-    # Convert meters (from haversine) to minutes for travel time.
-    # Assuming average speed of 30 km/h = 30000 meters / 60 minutes = 500 meters/minute
-    # Also, add a fixed service time of 5 minutes per stop.
-    def time_callback(from_index, to_index):
-        """Returns the travel time in minutes between the two nodes, plus service time."""
-        travel_distance_m = distance_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
-        travel_time_minutes = int(travel_distance_m / 500) # 500 meters/minute
-        service_time_minutes = 5 # Fixed service time per stop
-        return travel_time_minutes + service_time_minutes
-
-    time_callback_index = routing.RegisterTransitCallback(time_callback)
-
-    # Max slack (wait time) at a node, max cumulative time for the dimension.
-    # Set maximum travel time for a vehicle to 8 hours (480 minutes)
-    # 0 for `fix_start_cumul_to_zero` means the cumulative time at the depot starts at 0.
-    # AddDimension returns a bool, GetDimensionOrDie returns the dimension object.
-    routing.AddDimension(
-        time_callback_index,
-        30, # slack_max: allow vehicles to wait up to 30 minutes at a location if arriving early
-        480, # capacity: total travel time plus service time for a vehicle cannot exceed 480 minutes (8 hours)
-        False, # fix_start_cumul_to_zero: ensure the cumulative time at the depot (start node) is 0
-        "Time"
-    )
-    time_dim = routing.GetDimensionOrDie("Time") # Retrieve the dimension object
-
-    # Set time windows for each location. These values should now be in minutes.
-    for idx, loc in enumerate(all_points):
-        index = manager.NodeToIndex(idx)
-        start, end = loc.time_window
-        time_dim.CumulVar(index).SetRange(start, end)
-        
-    # Optional: Add a penalty for not visiting locations if you want to allow non-visits
-    # based on priorities. The current setup will try hard to visit all unless impossible.
-    for i, loc in enumerate(all_points[1:], 1): # Skip depot (index 0)
-        # Higher priority (1) means lower penalty for non-visit (more critical to visit).
-        # Lower priority (3) means higher penalty for non-visit (more flexible to skip).
-        # Using a large penalty makes it unlikely to skip unless no other solution exists.
-        penalty = (4 - loc.priority) * 1000000 # Increased penalty to strongly encourage visits
-        routing.AddDisjunction([manager.NodeToIndex(i)], penalty)
-
-    search_params = pywrapcp.DefaultRoutingSearchParameters()
-    search_params.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC) # Use PATH_CHEAPEST_ARC for initial solution
-    search_params.local_search_metaheuristic = (
-        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH) # Use GUIDED_LOCAL_SEARCH for improvement
-    search_params.time_limit.FromSeconds(30) # Increased time limit to 30 seconds for better solutions
-    # --- END MODIFICATIONS ---
-
-    solution = routing.SolveWithParameters(search_params)
-    if not solution:
-        raise HTTPException(status_code=400, detail="No solution found (consider adjusting time windows or capacities)")
-
-    routes = []
-    for v in range(req.vehicles):
-        index = routing.Start(v)
-        stops = []
-        # Add the depot as the starting stop
-        stops.append(all_points[manager.IndexToNode(index)].digipin) 
-        
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            # Only add if it's not the starting depot again or the end depot
-            if node_index != 0 or (node_index == 0 and len(stops) == 0): 
-                stops.append(all_points[node_index].digipin)
-            index = solution.Value(routing.NextVar(index))
-        # Add the final depot stop if it's different from the initial one
-        if all_points[manager.IndexToNode(index)].digipin != stops[-1]:
-            stops.append(all_points[manager.IndexToNode(index)].digipin)
-        
-        # Ensure the route ends at the depot if it's not already there
-        if len(stops) > 1 and stops[-1] != req.depot:
-             stops.append(req.depot)
-
-        # Filter out consecutive duplicate depot stops for cleaner routes
-        final_stops = []
-        for i, stop in enumerate(stops):
-            if i == 0 or stop != final_stops[-1] or stop != req.depot:
-                final_stops.append(stop)
-            # Handle the case where the route might look like [depot, A, depot, depot]
-            # If the last stop is a duplicate depot and not the *only* stop, remove it
-            if i > 0 and stop == req.depot and final_stops[-2] == req.depot:
-                 final_stops.pop() # Remove the redundant second depot
-
-        routes.append(OptimizedRoute(vehicle_id=v, stops=final_stops))
-
-    # Post-processing to remove empty routes or routes with only depot
-    filtered_routes = []
-    for route in routes:
-        # A valid route should have at least the depot, then a location, then the depot again.
-        # Or if only one stop, it must be the depot, but this means no locations were visited.
-        # For this problem, we want to see actual stops.
-        if len(route.stops) > 1 and (len(route.stops) > 2 or route.stops[0] != route.stops[1]):
-            # Further refinement: if the route is just [depot, depot] and there were actual locations to visit,
-            # this route isn't useful for carrying locations.
-            # Only include if it contains more than just the depot and its return.
-            if len(set(route.stops)) > 1 or (len(route.stops) == 2 and route.stops[0] == req.depot and route.stops[1] == req.depot and len(req.locations) == 0):
-                 filtered_routes.append(route)
-        elif len(route.stops) == 1 and route.stops[0] == req.depot and len(req.locations) == 0:
-            # If there are no locations and only depot, include it as a valid empty route essentially
-            filtered_routes.append(route)
-
-    return OptimizeRouteResponse(routes=filtered_routes)
 
+def route_job_response(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "objective": job["objective"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": datetime.fromtimestamp(job["created_at"], tz=timezone.utc),
+        "updated_at": datetime.fromtimestamp(job["updated_at"], tz=timezone.utc),
+    }
+
+
+@router.post("/api/optimize-route/jobs", response_model=RouteJobCreated, status_code=202, tags=["DIGIPIN"])
+async def submit_optimize_route_job(req: OptimizeRouteRequest):
+    """
+    Queue a route optimization and return its job id straight away.
+
+    Poll `GET /api/optimize-route/jobs/{job_id}` for the status and the best
+    solution found so far. Returns 503 when the solver queue is full.
+    """
+    store = get_route_job_store()
+    job_id = await run_in_threadpool(store.create, req)
+    try:
+        submit_route_job(job_id, req)
+    except SolverPoolFullError as e:
+        await run_in_threadpool(store.finish, job_id, JOB_FAILED, None, str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/api/optimize-route/jobs/{job_id}", response_model=RouteJobResponse, tags=["DIGIPIN"])
+async def get_optimize_route_job(job_id: str):
+    """Status of a route optimization job, with the best solution found so far."""
+    job = await run_in_threadpool(get_route_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Route job not found")
+    return route_job_response(job)
+
+
+@router.get("/api/optimize-route/jobs/{job_id}/events", tags=["DIGIPIN"])
+async def stream_optimize_route_job(job_id: str):
+    """
+    Follow a route job as server-sent events: a `solution` event each time
+    the solver records a better solution, then a single `done` event with
+    the final job. Event data has the same shape as the job GET response.
+    """
+    store = get_route_job_store()
+    job = await run_in_threadpool(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Route job not found")
+
+    async def events():
+        current, sent_objective = job, None
+        while True:
+            if current["result"] is not None and current["objective"] != sent_objective:
+                sent_objective = current["objective"]
+                yield f"event: solution\ndata: {RouteJobResponse(**route_job_response(current)).model_dump_json()}\n\n"
+            if current["status"] not in ACTIVE_JOB_STATUSES:
+                yield f"event: done\ndata: {RouteJobResponse(**route_job_response(current)).model_dump_json()}\n\n"
+                return
+            # The response stops this generator when the client disconnects
+            await asyncio.sleep(ROUTE_JOB_EVENT_POLL_SECONDS)
+            current = await run_in_threadpool(store.get, job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.delete("/api/optimize-route/jobs/{job_id}", response_model=RouteJobResponse, tags=["DIGIPIN"])
+async def cancel_optimize_route_job(job_id: str):
+    """
+    Cancel a queued or running job. A running solve stops within a moment
+    and keeps the best solution it had found. Returns 409 if the job has
+    already finished.
+    """
+    store = get_route_job_store()
+    if not await run_in_threadpool(store.request_cancel, job_id):
+        job = await run_in_threadpool(store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Route job not found")
+        raise HTTPException(status_code=409, detail=f"Route job already {job['status']}")
+    return route_job_response(await run_in_threadpool(store.get, job_id))
+
+
+@router.post("/api/optimize-route/reoptimize", response_model=OptimizeRouteResponse, tags=["DIGIPIN"])
+async def reoptimize_route(req: ReoptimizeRouteRequest):
+    """
+    Re-optimize a solved request after adding or removing stops.
+
+    Start from a route job (`job_id`) or from a previous `request` and its
+    `routes`. The search begins at the previous routes with removed stops
+    taken out and added stops unassigned, so small edits settle within
+    `time_limit_seconds` instead of a full solve. Decomposed requests are
+    re-optimized as a single model.
+    """
+    if req.job_id is not None:
+        job = await run_in_threadpool(get_route_job_store().get, req.job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Route job not found")
+        if job["result"] is None:
+            raise HTTPException(status_code=409, detail="Route job has no solution yet")
+        previous = OptimizeRouteRequest.model_validate_json(job["request"])
+        routes = OptimizeRouteResponse.model_validate(job["result"]).routes
+    elif req.request is not None and req.routes is not None:
+        previous, routes = req.request, req.routes
+    else:
+        raise HTTPException(status_code=422, detail="Provide job_id, or both request and routes")
+
+    try:
+        edited, initial_routes = apply_route_diff(previous, routes, req.add, req.remove)
+        edited = edited.model_copy(update={
+            "solver": edited.solver.model_copy(update={"time_limit_seconds": req.time_limit_seconds})
+        })
+        return await get_solver_pool().run(solve_route, edited, None, None, initial_routes)
+    except SolverPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RouteOptimizationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,7 +1,9 @@
-from pydantic import BaseModel,Field
+from pydantic import BaseModel,Field,constr,model_validator
 from uuid import UUID
 from datetime import datetime
-from typing import Optional,Tuple,List
+from typing import Optional,Tuple,List,Literal
+from config import DIGIPIN_BATCH_MAX_ITEMS, ROUTE_JOB_MAX_TIME_LIMIT_SECONDS
+from utils.digipin import DIGIPIN_MAX_INPUT_LENGTH
 
 class DigipinCreate(BaseModel):
     digipin: str
@@ -24,6 +26,31 @@ class DecodeDigipinResponse(BaseModel):
     latitude: float
     longitude: float
 
+class LatLng(BaseModel):
+    lat: float
+    lng: float
+
+class BatchEncodeRequest(BaseModel):
+    points: List[LatLng] = Field(..., max_length=DIGIPIN_BATCH_MAX_ITEMS)
+
+class BatchEncodeResult(BaseModel):
+    digipin: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchEncodeResponse(BaseModel):
+    results: List[BatchEncodeResult]
+
+class BatchDecodeRequest(BaseModel):
+    digipins: List[constr(max_length=DIGIPIN_MAX_INPUT_LENGTH)] = Field(..., max_length=DIGIPIN_BATCH_MAX_ITEMS)
+
+class BatchDecodeResult(BaseModel):
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    error: Optional[str] = None
+
+class BatchDecodeResponse(BaseModel):
+    results: List[BatchDecodeResult]
+
 class AddressResponse(BaseModel):
     latitude: float
     longitude: float
@@ -38,14 +65,116 @@ class RouteLocation(BaseModel):
     priority: int = Field(..., ge=1, le=3)
     time_window: Tuple[int, int] = Field(..., description="Start and end time window")
 
-class OptimizeRouteRequest(BaseModel):
+class SolverOptions(BaseModel):
+    time_limit_seconds: int = Field(
+        30, ge=1, le=ROUTE_JOB_MAX_TIME_LIMIT_SECONDS,
+        description="Search time limit; /api/optimize-route allows less than background jobs"
+    )
+    solution_limit: Optional[int] = Field(None, ge=1, description="Stop after this many solutions")
+    plateau_seconds: Optional[float] = Field(
+        None, gt=0, description="Stop once the best solution has not improved for this long"
+    )
+    first_solution_strategy: Literal[
+        "automatic", "path_cheapest_arc", "path_most_constrained_arc", "savings", "christofides",
+        "parallel_cheapest_insertion", "sequential_cheapest_insertion", "local_cheapest_insertion",
+        "global_cheapest_arc", "local_cheapest_arc"
+    ] = "path_cheapest_arc"
+    local_search_metaheuristic: Literal[
+        "automatic", "greedy_descent", "guided_local_search", "simulated_annealing", "tabu_search"
+    ] = "guided_local_search"
+
+class RouteSolveOptions(BaseModel):
+    """How to model and search a route request; shared by single- and multi-depot requests."""
+    arc_model: Literal["dense", "sparse"] = Field(
+        "dense",
+        description="dense: every stop may follow any other. sparse: each stop may only be followed by "
+                    "its `neighbors` nearest stops or the depot, for very large requests"
+    )
+    neighbors: int = Field(40, ge=1, le=200, description="Nearest stops kept per stop in sparse mode")
+    decomposition: Optional[Literal["kmeans", "prefix"]] = Field(
+        None,
+        description="Split stops into geographic clusters (k-means on coordinates, or shared DIGIPIN prefix) "
+                    "and solve each cluster separately, in parallel"
+    )
+    cluster_size: int = Field(400, ge=10, le=5000, description="Target number of stops per cluster")
+    improvement_seconds: int = Field(
+        0, ge=0, le=120, description="Length of a global improvement pass over the stitched routes"
+    )
+    solver: SolverOptions = Field(default_factory=SolverOptions)
+    distance_provider: Literal["haversine", "osrm"] = Field(
+        "haversine",
+        description="haversine: straight-line distance at 30 km/h. osrm: road distances and durations "
+                    "from the configured routing engine (dense arc model only)"
+    )
+
+    @model_validator(mode="after")
+    def check_distance_provider(self):
+        # The sparse model, also used by the improvement pass, has haversine arcs only
+        if self.distance_provider != "haversine" and (self.arc_model == "sparse" or self.improvement_seconds):
+            raise ValueError("distance_provider other than haversine requires the dense arc model and no improvement pass")
+        return self
+
+class OptimizeRouteRequest(RouteSolveOptions):
     depot: str
     vehicles: int
     locations: List[RouteLocation]
 
+class DepotFleet(BaseModel):
+    depot: str
+    vehicles: int = Field(..., ge=1)
+    locations: List[RouteLocation] = Field(default_factory=list, description="Stops only this depot serves")
+
+class MultiDepotRouteRequest(RouteSolveOptions):
+    depots: List[DepotFleet] = Field(..., min_length=1)
+    locations: List[RouteLocation] = Field(
+        default_factory=list, description="Stops any depot may serve; each is given to its nearest depot"
+    )
+
 class OptimizedRoute(BaseModel):
     vehicle_id: int
     stops: List[str]
 
+class DroppedStop(BaseModel):
+    digipin: str
+    reason: str
+
 class OptimizeRouteResponse(BaseModel):
-    routes: List[OptimizedRoute]
\ No newline at end of file
+    routes: List[OptimizedRoute]
+    dropped: List[DroppedStop] = Field(
+        default_factory=list, description="Stops left out of every route, with the reason"
+    )
+    cache_hit: bool = Field(False, description="True when served from the route result cache")
+
+class DepotSolveStats(BaseModel):
+    depot: str
+    vehicles: int
+    stops: int = Field(..., description="Stops given to this depot, its own plus the nearest shared ones")
+    vehicle_ids: List[int] = Field(..., description="Vehicle ids of this depot in the merged routes")
+    solve_seconds: float = Field(..., description="Time spent solving this depot in its solver process")
+
+class MultiDepotRouteResponse(BaseModel):
+    routes: List[OptimizedRoute]
+    dropped: List[DroppedStop] = Field(default_factory=list)
+    depots: List[DepotSolveStats]
+    elapsed_seconds: float = Field(..., description="Wall-clock time of the whole request, depots solved in parallel")
+
+class ReoptimizeRouteRequest(BaseModel):
+    job_id: Optional[str] = Field(None, description="Route job whose request and best routes to start from")
+    request: Optional[OptimizeRouteRequest] = Field(None, description="Previous request, when no job_id is given")
+    routes: Optional[List[OptimizedRoute]] = Field(None, description="Previous routes, when no job_id is given")
+    add: List[RouteLocation] = Field(default_factory=list, description="Stops to add")
+    remove: List[str] = Field(default_factory=list, description="DIGIPINs of stops to remove")
+    time_limit_seconds: int = Field(5, ge=1, le=30, description="Search time for the re-optimization")
+
+class RouteJobCreated(BaseModel):
+    job_id: str
+    status: str
+
+class RouteJobResponse(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, completed, failed or cancelled")
+    objective: Optional[int] = Field(None, description="Solver cost of the best solution so far")
+    result: Optional[OptimizeRouteResponse] = Field(None, description="Best solution found so far")
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
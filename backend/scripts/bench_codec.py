@@ -0,0 +1,34 @@
+# Microbenchmark: per-call time of the table-driven scalar codec against the
+# original loop-based implementation. Run from backend/: python -m scripts.bench_codec
+import random
+import timeit
+
+from utils.digipin import get_digipin, get_lat_lng_from_digipin
+from utils.digipin_reference import reference_get_digipin, reference_get_lat_lng_from_digipin
+
+
+def per_call_us(func, args_list, repeat=5):
+    """Best-of-`repeat` mean time per call in microseconds."""
+    def run():
+        for args in args_list:
+            func(*args)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(args_list) * 1e6
+
+
+def main(samples: int = 20000, seed: int = 0):
+    rng = random.Random(seed)
+    points = [(rng.uniform(2.5, 38.5), rng.uniform(63.5, 99.5)) for _ in range(samples)]
+    codes = [(get_digipin(lat, lon),) for lat, lon in points]
+
+    rows = [
+        ("encode", per_call_us(reference_get_digipin, points), per_call_us(get_digipin, points)),
+        ("decode", per_call_us(reference_get_lat_lng_from_digipin, codes), per_call_us(get_lat_lng_from_digipin, codes)),
+    ]
+    print(f"{'op':<8}{'reference us':>14}{'tables us':>12}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<8}{before:>14.2f}{after:>12.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
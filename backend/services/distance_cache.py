@@ -0,0 +1,156 @@
+#backend/services/distance_cache.py
+"""
+Pairwise distance cache for route matrices.
+
+The same depot and customer DIGIPINs come back request after request, so
+distances and travel times are cached per distance provider and ordered
+pair of packed DIGIPINs (see `digipin_to_int`): an in-memory LRU tier,
+optionally backed by a SQLite file that survives restarts and is shared by
+every solver process. Building a matrix looks every pair up and only
+computes the ones that are missing.
+"""
+import sqlite3
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional
+
+import numpy as np
+
+from config import ROUTE_DISTANCE_CACHE_SIZE, ROUTE_DISTANCE_CACHE_DB
+
+# Packed DIGIPINs are 40-bit integers; a pair key is the two side by side
+PAIR_KEY_SHIFT = 40
+
+
+class DistanceCache:
+    """
+    Distances in whole meters and travel times in whole minutes of one
+    distance provider, by (from, to) packed DIGIPIN pair. Pairs are ordered,
+    so providers whose distances are not symmetric work too. Counts hits per
+    tier and misses; each process has its own memory tier and counters.
+    """
+
+    def __init__(self, size: int = ROUTE_DISTANCE_CACHE_SIZE, path: Optional[str] = ROUTE_DISTANCE_CACHE_DB, provider: str = "haversine"):
+        self.size = size
+        self.path = path
+        self.provider = provider
+        # An OrderedDict rather than cachetools.LRUCache: its lookups and
+        # bulk updates run in C, which matters at n * n pairs per matrix
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS distances "
+                    "(provider TEXT NOT NULL, from_code INTEGER NOT NULL, to_code INTEGER NOT NULL, "
+                    "meters INTEGER NOT NULL, minutes INTEGER NOT NULL, "
+                    "PRIMARY KEY (provider, from_code, to_code)) WITHOUT ROWID"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _remember(self, keys: list, values: list):
+        self._memory.update(zip(keys, values))
+        excess = len(self._memory) - self.size
+        if excess > 0:
+            for key in list(islice(self._memory, excess)):
+                del self._memory[key]
+
+    def _read_disk(self, pairs: list) -> dict:
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE wanted (from_code INTEGER, to_code INTEGER)")
+            conn.executemany("INSERT INTO wanted VALUES (?, ?)", pairs)
+            rows = conn.execute(
+                "SELECT d.from_code, d.to_code, d.meters, d.minutes FROM wanted w "
+                "JOIN distances d ON d.provider = ? AND d.from_code = w.from_code AND d.to_code = w.to_code",
+                (self.provider,)
+            ).fetchall()
+            conn.execute("DROP TABLE wanted")
+        return {(from_code, to_code): (meters, minutes) for from_code, to_code, meters, minutes in rows}
+
+    def _write_disk(self, rows: list):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?, ?)",
+                [(self.provider,) + row for row in rows]
+            )
+
+    def matrix(self, codes: list, compute) -> tuple:
+        """
+        n x n int32 (meters, minutes) matrices between packed DIGIPIN
+        `codes`. `compute(from_nodes, to_nodes)` is called once, with index
+        arrays into `codes`, for the pairs found in neither tier and returns
+        their (meters, minutes) arrays. Pairs of equal codes are 0 and never
+        cached.
+        """
+        n = len(codes)
+        meters = np.zeros((n, n), dtype=np.int32)
+        minutes = np.zeros((n, n), dtype=np.int32)
+        from_nodes, to_nodes = np.nonzero(np.not_equal.outer(codes, codes))
+        if not len(from_nodes):
+            return meters, minutes
+        code_list = [int(code) for code in codes]
+        pairs = list(zip([code_list[i] for i in from_nodes.tolist()], [code_list[j] for j in to_nodes.tolist()]))
+        keys = [(from_code << PAIR_KEY_SHIFT) | to_code for from_code, to_code in pairs]
+
+        lookup = self._memory.get
+        values = [lookup(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        self.memory_hits += len(keys) - len(missing)
+        move_to_end = self._memory.move_to_end
+        for key, value in zip(keys, values):
+            if value is not None:
+                move_to_end(key)
+
+        if missing and self.path:
+            stored = self._read_disk([pairs[i] for i in missing])
+            if stored:
+                found = [i for i in missing if pairs[i] in stored]
+                for i in found:
+                    values[i] = stored[pairs[i]]
+                self._remember([keys[i] for i in found], [values[i] for i in found])
+                self.disk_hits += len(found)
+                missing = [i for i in missing if values[i] is None]
+
+        if missing:
+            computed_meters, computed_minutes = compute(from_nodes[missing], to_nodes[missing])
+            computed = list(zip(
+                np.asarray(computed_meters).astype(np.int32).tolist(),
+                np.asarray(computed_minutes).astype(np.int32).tolist()
+            ))
+            for i, value in zip(missing, computed):
+                values[i] = value
+            self._remember([keys[i] for i in missing], computed)
+            if self.path:
+                self._write_disk([pairs[i] + value for i, value in zip(missing, computed)])
+            self.misses += len(missing)
+
+        values = np.array(values, dtype=np.int32)
+        meters[from_nodes, to_nodes] = values[:, 0]
+        minutes[from_nodes, to_nodes] = values[:, 1]
+        return meters, minutes
+
+    def stats(self) -> dict:
+        """Hit counts by tier, misses, and the overall hit rate of this process."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+_distance_caches = {}
+
+
+def get_distance_cache(provider: str = "haversine") -> DistanceCache:
+    """This process's distance cache for `provider`, created on first use."""
+    if provider not in _distance_caches:
+        _distance_caches[provider] = DistanceCache(provider=provider)
+    return _distance_caches[provider]
@@ -0,0 +1,205 @@
+#backend/services/distance_providers.py
+"""
+Distance providers for route optimization: where the distance and travel
+time of every arc come from.
+
+`haversine` (the default) is the straight-line distance at an assumed
+500 meters/minute. `osrm` asks an OSRM-compatible routing engine for road
+distances and durations through its table service, in square tiles of
+stops fetched concurrently over one pooled HTTP client. Both go through the
+pairwise distance cache, so only arcs that were never seen before are
+computed or fetched.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+from config import (
+    ROUTE_DISTANCE_CACHE_MAX_STOPS, ROUTE_OSRM_URL, ROUTE_OSRM_PROFILE, ROUTE_OSRM_TILE_SIZE,
+    ROUTE_OSRM_CONCURRENCY, ROUTE_OSRM_RETRIES, ROUTE_OSRM_TIMEOUT_SECONDS
+)
+from services.distance_cache import DistanceCache, get_distance_cache
+from utils.digipin import digipin_to_int, haversine_many, haversine_matrix
+
+# Rows of the distance matrix computed per NumPy pass, to bound temporaries
+DISTANCE_MATRIX_BLOCK_ROWS = 256
+
+# Assumed average speed of 30 km/h = 30000 meters / 60 minutes
+HAVERSINE_METERS_PER_MINUTE = 500
+
+# Arc costs used when the routing engine finds no road between two stops;
+# the travel time alone is longer than any vehicle's shift
+UNREACHABLE_METERS = 10000000
+UNREACHABLE_MINUTES = 100000
+
+# First retry delay for failed table requests, doubled on every attempt
+RETRY_BACKOFF_SECONDS = 0.2
+
+
+class DistanceProviderError(RuntimeError):
+    """A distance provider is not configured or could not supply distances."""
+
+
+def build_distance_matrix(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Whole-meter haversine distances between all points as an n x n int32
+    array (truncated, as the scalar `int(haversine(...))` did). Built in row
+    blocks so peak memory stays close to the 4 bytes per cell of the result.
+    """
+    n = len(lats)
+    matrix = np.empty((n, n), dtype=np.int32)
+    for start in range(0, n, DISTANCE_MATRIX_BLOCK_ROWS):
+        stop = min(start + DISTANCE_MATRIX_BLOCK_ROWS, n)
+        matrix[start:stop] = haversine_matrix(lats[start:stop], lons[start:stop], lats, lons)
+    return matrix
+
+
+class DistanceProvider:
+    """
+    Interface of a distance provider. `travel_matrices` returns the n x n
+    int32 distance (meters) and travel time (minutes, without service time)
+    matrices between points, given their coordinates and DIGIPINs.
+    """
+
+    name = None
+
+    def travel_matrices(self, lats: np.ndarray, lons: np.ndarray, digipins: list) -> tuple:
+        raise NotImplementedError
+
+
+class HaversineProvider(DistanceProvider):
+    """
+    Straight-line distances. Cheap enough to compute that only requests of
+    up to ROUTE_DISTANCE_CACHE_MAX_STOPS points use the distance cache;
+    looking up every pair of a larger matrix would cost more than it saves.
+    """
+
+    name = "haversine"
+
+    def travel_matrices(self, lats: np.ndarray, lons: np.ndarray, digipins: list) -> tuple:
+        cache = get_distance_cache(self.name)
+        if cache.size and len(lats) <= ROUTE_DISTANCE_CACHE_MAX_STOPS:
+            def compute(from_nodes, to_nodes):
+                meters = haversine_many(lats[from_nodes], lons[from_nodes], lats[to_nodes], lons[to_nodes]).astype(np.int32)
+                return meters, meters // HAVERSINE_METERS_PER_MINUTE
+
+            return cache.matrix([digipin_to_int(digipin) for digipin in digipins], compute)
+        meters = build_distance_matrix(lats, lons)
+        return meters, meters // HAVERSINE_METERS_PER_MINUTE
+
+
+class OsrmTableProvider(DistanceProvider):
+    """
+    Road distances and durations from an OSRM-compatible table service
+    (`GET {base_url}/table/v1/{profile}/{lon,lat;...}`). Missing pairs are
+    grouped into tiles of `tile_size` sources by `tile_size` destinations,
+    and up to `concurrency` tiles are fetched at once over a shared,
+    connection-pooled client. Transport errors, 429 and 5xx responses are
+    retried `retries` times with exponential backoff.
+    """
+
+    name = "osrm"
+
+    def __init__(self, base_url: str, profile: str = ROUTE_OSRM_PROFILE, tile_size: int = ROUTE_OSRM_TILE_SIZE,
+                 concurrency: int = ROUTE_OSRM_CONCURRENCY, retries: int = ROUTE_OSRM_RETRIES,
+                 timeout: float = ROUTE_OSRM_TIMEOUT_SECONDS, cache: DistanceCache = None):
+        self.profile = profile
+        self.tile_size = tile_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.cache = cache if cache is not None else get_distance_cache(self.name)
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+    def travel_matrices(self, lats: np.ndarray, lons: np.ndarray, digipins: list) -> tuple:
+        return self.cache.matrix(
+            [digipin_to_int(digipin) for digipin in digipins],
+            lambda from_nodes, to_nodes: self.fetch_pairs(lats, lons, from_nodes, to_nodes)
+        )
+
+    def fetch_pairs(self, lats: np.ndarray, lons: np.ndarray, from_nodes: np.ndarray, to_nodes: np.ndarray) -> tuple:
+        """(meters, minutes) arrays for the given pairs, fetching every tile that holds one."""
+        tile_rows = from_nodes // self.tile_size
+        tile_columns = to_nodes // self.tile_size
+        tile_ids = tile_rows * (len(lats) // self.tile_size + 1) + tile_columns
+        order = np.argsort(tile_ids, kind="stable")
+        tiles, starts = np.unique(tile_ids[order], return_index=True)
+        groups = np.split(order, starts[1:])
+
+        def fetch(group):
+            row, column = int(tile_rows[group[0]]), int(tile_columns[group[0]])
+            sources = np.arange(row * self.tile_size, min((row + 1) * self.tile_size, len(lats)))
+            destinations = np.arange(column * self.tile_size, min((column + 1) * self.tile_size, len(lats)))
+            meters, minutes = self.fetch_tile(lats, lons, sources, destinations)
+            local_from = from_nodes[group] - sources[0]
+            local_to = to_nodes[group] - destinations[0]
+            return meters[local_from, local_to], minutes[local_from, local_to]
+
+        meters = np.empty(len(from_nodes), dtype=np.int32)
+        minutes = np.empty(len(from_nodes), dtype=np.int32)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for group, (group_meters, group_minutes) in zip(groups, executor.map(fetch, groups)):
+                meters[group] = group_meters
+                minutes[group] = group_minutes
+        return meters, minutes
+
+    def fetch_tile(self, lats: np.ndarray, lons: np.ndarray, sources: np.ndarray, destinations: np.ndarray) -> tuple:
+        """One table request: (meters, minutes) matrices of `sources` by `destinations`."""
+        points = np.concatenate([sources, destinations])
+        coordinates = ";".join(f"{lons[i]:.6f},{lats[i]:.6f}" for i in points.tolist())
+        params = {
+            "sources": ";".join(map(str, range(len(sources)))),
+            "destinations": ";".join(map(str, range(len(sources), len(points)))),
+            "annotations": "distance,duration",
+        }
+        data = self._get(f"/table/v1/{self.profile}/{coordinates}", params)
+        if data.get("code") != "Ok":
+            raise DistanceProviderError(f"Routing engine error: {data.get('message', data.get('code'))}")
+        # Unreachable pairs come back as null, which NumPy reads as NaN
+        distances = np.array(data["distances"], dtype=np.float64)
+        durations = np.array(data["durations"], dtype=np.float64)
+        unreachable = np.isnan(distances) | np.isnan(durations)
+        meters = np.where(unreachable, UNREACHABLE_METERS, np.nan_to_num(distances)).astype(np.int32)
+        minutes = np.where(unreachable, UNREACHABLE_MINUTES, np.rint(np.nan_to_num(durations) / 60)).astype(np.int32)
+        return meters, minutes
+
+    def _get(self, path: str, params: dict) -> dict:
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.client.get(path, params=params)
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPStatusError as e:
+                raise DistanceProviderError(f"Routing engine rejected the table request: HTTP {e.response.status_code}")
+            except httpx.TransportError as e:
+                error = repr(e)
+            if attempt < self.retries:
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        raise DistanceProviderError(f"Routing engine unavailable after {self.retries + 1} attempts: {error}")
+
+    def close(self):
+        self.client.close()
+
+
+_distance_providers = {}
+
+
+def get_distance_provider(name: str) -> DistanceProvider:
+    """This process's provider called `name`, created on first use."""
+    if name not in _distance_providers:
+        if name == "haversine":
+            _distance_providers[name] = HaversineProvider()
+        elif name == "osrm":
+            if not ROUTE_OSRM_URL:
+                raise DistanceProviderError("The osrm distance provider is not configured (set ROUTE_OSRM_URL)")
+            _distance_providers[name] = OsrmTableProvider(ROUTE_OSRM_URL)
+        else:
+            raise DistanceProviderError(f"Unknown distance provider: {name}")
+    return _distance_providers[name]
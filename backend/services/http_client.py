@@ -0,0 +1,105 @@
+#backend/services/http_client.py
+"""
+The app-wide outgoing HTTP client, for calls to third-party services such as
+Nominatim. One pooled client for the life of the app keeps connections (and
+their TLS sessions) alive between requests instead of opening a new one per
+call. The lifespan opens it on startup and closes it on shutdown.
+"""
+import httpx
+
+from config import (
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS, HTTP_CLIENT_READ_TIMEOUT_SECONDS, HTTP_CLIENT_MAX_CONNECTIONS,
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS, HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS, HTTP_CLIENT_HTTP2
+)
+
+USER_AGENT = "digipin-app"
+
+
+class MetricsHTTPTransport(httpx.AsyncHTTPTransport):
+    """An AsyncHTTPTransport that counts requests, so pool saturation can be watched."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except httpx.TransportError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        connections = self._pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+def create_http_transport() -> MetricsHTTPTransport:
+    """
+    A transport with keep-alive pooling and connection limits. HTTP/2
+    (HTTP_CLIENT_HTTP2) needs the optional `h2` package.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    return MetricsHTTPTransport(limits=limits, http2=HTTP_CLIENT_HTTP2)
+
+
+# Waiting for a free pooled connection is bounded like connecting
+HTTP_CLIENT_TIMEOUT = httpx.Timeout(
+    connect=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    read=HTTP_CLIENT_READ_TIMEOUT_SECONDS,
+    write=HTTP_CLIENT_READ_TIMEOUT_SECONDS,
+    pool=HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+)
+
+_http_client = None
+_http_transport = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The app-wide client; opened by the lifespan, or on first use without one."""
+    global _http_client, _http_transport
+    if _http_client is None or _http_client.is_closed:
+        _http_transport = create_http_transport()
+        _http_client = httpx.AsyncClient(
+            transport=_http_transport, timeout=HTTP_CLIENT_TIMEOUT, headers={"User-Agent": USER_AGENT}
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client, _http_transport
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = _http_transport = None
+
+
+def http_client_stats() -> dict:
+    """Pool limits and usage of the app-wide client."""
+    get_http_client()
+    return {
+        "http2": HTTP_CLIENT_HTTP2,
+        "max_connections": HTTP_CLIENT_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        **_http_transport.stats(),
+    }
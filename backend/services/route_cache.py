@@ -0,0 +1,124 @@
+#backend/services/route_cache.py
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Optional
+
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+
+from config import ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL_SECONDS, ROUTE_CACHE_DB
+from schemas.digipin_schemas import OptimizeRouteRequest, OptimizeRouteResponse
+
+
+def route_request_key(req: OptimizeRouteRequest) -> str:
+    """
+    Content hash of a route request. Stop order does not matter, so retries
+    and refreshes that list the same stops differently share a key. DIGIPINs
+    are kept as sent, since responses echo them back. Every solver option is
+    part of the key.
+    """
+    data = req.model_dump(mode="json")
+    data["locations"] = sorted(
+        (loc.digipin, loc.priority, list(loc.time_window)) for loc in req.locations
+    )
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class RouteResultCache:
+    """
+    Solved route responses by request key: a bounded in-memory LRU with a
+    TTL, optionally backed by a SQLite file so results survive restarts.
+    Identical requests that arrive while one is being solved wait for that
+    solve instead of starting their own.
+    """
+
+    def __init__(self, size: int = ROUTE_CACHE_SIZE, ttl: int = ROUTE_CACHE_TTL_SECONDS, path: Optional[str] = ROUTE_CACHE_DB):
+        self.ttl = ttl
+        self.path = path
+        self._memory = TTLCache(maxsize=size, ttl=ttl)
+        self._inflight = {}
+        if path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS route_results "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM route_results WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write_disk(self, key: str, response: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM route_results WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "INSERT OR REPLACE INTO route_results (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, time.time() + self.ttl)
+            )
+
+    async def get(self, key: str) -> Optional[OptimizeRouteResponse]:
+        response = self._memory.get(key)
+        if response is None and self.path:
+            stored = await run_in_threadpool(self._read_disk, key)
+            if stored is not None:
+                response = OptimizeRouteResponse.model_validate_json(stored)
+                self._memory[key] = response
+        return response
+
+    async def put(self, key: str, response: OptimizeRouteResponse):
+        self._memory[key] = response
+        if self.path:
+            await run_in_threadpool(self._write_disk, key, response.model_dump_json())
+
+    async def get_or_solve(self, req: OptimizeRouteRequest, solve) -> OptimizeRouteResponse:
+        """
+        Return the cached response for `req` (with `cache_hit` set), or
+        await `solve()` and cache what it returns. Failed solves are not
+        cached.
+        """
+        key = route_request_key(req)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached.model_copy(update={"cache_hit": True})
+        if key in self._inflight:
+            response = await asyncio.shield(self._inflight[key])
+            return response.model_copy(update={"cache_hit": True})
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await solve()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't let the loop warn about it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(response)
+        await self.put(key, response)
+        return response
+
+
+_route_cache = None
+
+
+def get_route_cache() -> RouteResultCache:
+    """The process-wide route result cache, created on first use."""
+    global _route_cache
+    if _route_cache is None:
+        _route_cache = RouteResultCache()
+    return _route_cache
@@ -0,0 +1,157 @@
+#backend/services/route_decomposition.py
+"""
+Cluster-first, route-second solving for very large route requests.
+
+Stops are split into geographic clusters, either by k-means on decoded
+coordinates or by cutting the stops, sorted by packed DIGIPIN, into runs
+that share long prefixes. Vehicles are shared out in proportion to cluster
+size and every cluster is solved as its own smaller request. The routes are
+then stitched back together and, optionally, improved by a short pass over
+the whole request that starts from the stitched solution.
+"""
+import math
+
+import numpy as np
+
+from schemas.digipin_schemas import OptimizeRouteRequest, OptimizeRouteResponse
+from services.route_optimizer import decode_route_points, routes_to_nodes, solve_route
+from utils.digipin import digipin_to_int
+
+KMEANS_MAX_ITERATIONS = 25
+
+
+def kmeans_labels(lats: np.ndarray, lons: np.ndarray, clusters: int) -> np.ndarray:
+    """
+    Lloyd's k-means on an equirectangular projection of the points. Starts
+    from points evenly spaced in latitude order, so results are reproducible.
+    """
+    points = np.column_stack([lats, lons * math.cos(math.radians(float(lats.mean())))])
+    order = np.argsort(lats, kind="stable")
+    centers = points[order[(2 * np.arange(clusters) + 1) * len(points) // (2 * clusters)]]
+    labels = np.zeros(len(points), dtype=np.int64)
+    for _ in range(KMEANS_MAX_ITERATIONS):
+        # |p - c|^2 up to the per-point constant |p|^2, as an n x k array
+        labels = ((centers ** 2).sum(axis=1)[None, :] - 2 * points @ centers.T).argmin(axis=1)
+        counts = np.bincount(labels, minlength=clusters)
+        sums = np.stack([np.bincount(labels, weights=points[:, axis], minlength=clusters) for axis in (0, 1)], axis=1)
+        moved = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+    return labels
+
+
+def cluster_stops(req: OptimizeRouteRequest) -> np.ndarray:
+    """Cluster label of every location, numbered 0..m-1 with no gaps."""
+    n = len(req.locations)
+    clusters = min(math.ceil(n / req.cluster_size), req.vehicles)
+    lats, lons = decode_route_points([loc.digipin for loc in req.locations])
+    if clusters <= 1:
+        return np.zeros(n, dtype=np.int64)
+    if req.decomposition == "prefix":
+        # Packed DIGIPINs order stops cell by cell, so equal runs of the
+        # sorted order are groups that share the longest possible prefix
+        codes = np.array([digipin_to_int(loc.digipin) for loc in req.locations], dtype=np.int64)
+        labels = np.empty(n, dtype=np.int64)
+        labels[np.argsort(codes, kind="stable")] = np.arange(n) * clusters // n
+    else:
+        labels = kmeans_labels(lats, lons, clusters)
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def split_vehicles(sizes: np.ndarray, vehicles: int) -> np.ndarray:
+    """Share vehicles out in proportion to cluster sizes, at least one each."""
+    shares = sizes / sizes.sum() * (vehicles - len(sizes))
+    counts = np.floor(shares).astype(np.int64)
+    leftover = vehicles - len(sizes) - counts.sum()
+    counts[np.argsort(counts - shares, kind="stable")[:leftover]] += 1
+    return counts + 1
+
+
+def partition_request(req: OptimizeRouteRequest) -> list:
+    """Split a request into one sub-request per cluster."""
+    labels = cluster_stops(req)
+    sizes = np.bincount(labels)
+    vehicles = split_vehicles(sizes, req.vehicles)
+    return [
+        req.model_copy(update={
+            "vehicles": int(vehicles[cluster]),
+            "locations": [req.locations[i] for i in np.flatnonzero(labels == cluster)],
+            "decomposition": None,
+            "improvement_seconds": 0,
+        })
+        for cluster in range(len(sizes))
+    ]
+
+
+def merge_routes(parts: list, responses: list) -> OptimizeRouteResponse:
+    """Stitch per-cluster routes together, numbering vehicles across clusters."""
+    routes = []
+    dropped = []
+    offset = 0
+    for part, response in zip(parts, responses):
+        routes.extend(route.model_copy(update={"vehicle_id": offset + route.vehicle_id}) for route in response.routes)
+        dropped.extend(response.dropped)
+        offset += part.vehicles
+    return OptimizeRouteResponse(routes=routes, dropped=dropped)
+
+
+def improve_routes(req: OptimizeRouteRequest, merged: OptimizeRouteResponse, on_solution=None, should_stop=None) -> OptimizeRouteResponse:
+    """
+    Global improvement pass: search the whole request, in the sparse arc
+    model, starting from the stitched routes for `req.improvement_seconds`.
+    """
+    initial_routes = [[] for _ in range(req.vehicles)]
+    for route, nodes in zip(merged.routes, routes_to_nodes(req, [route.stops for route in merged.routes])):
+        initial_routes[route.vehicle_id] = nodes
+    solver = req.solver.model_copy(update={"time_limit_seconds": req.improvement_seconds})
+    return solve_route(
+        req.model_copy(update={"arc_model": "sparse", "decomposition": None, "solver": solver}),
+        on_solution=on_solution,
+        should_stop=should_stop,
+        initial_routes=initial_routes
+    )
+
+
+def solve_decomposed(req: OptimizeRouteRequest, on_solution=None, should_stop=None) -> OptimizeRouteResponse:
+    """
+    Solve a decomposed request in the current process, one cluster after
+    another; for background jobs, which already run inside a solver process.
+    Same callbacks as `solve_route`. Progress is reported as the merged
+    routes of the clusters solved so far; once `should_stop()` is True the
+    remaining clusters are skipped.
+    """
+    parts = partition_request(req)
+    responses = []
+    objectives = []
+
+    def cluster_solution(response, objective):
+        if on_solution is not None:
+            on_solution(merge_routes(parts, responses + [response]), sum(objectives) + objective)
+
+    for part in parts:
+        if should_stop is not None and should_stop():
+            break
+        best = {}
+
+        def record(response, objective):
+            best["objective"] = objective
+            cluster_solution(response, objective)
+
+        responses.append(solve_route(part, on_solution=record, should_stop=should_stop))
+        objectives.append(best.get("objective", 0))
+
+    merged = merge_routes(parts, responses)
+    if req.improvement_seconds and len(responses) == len(parts) and not (should_stop is not None and should_stop()):
+        merged = improve_routes(req, merged, on_solution=on_solution, should_stop=should_stop)
+    return merged
+
+
+async def solve_decomposed_in_pool(pool, req: OptimizeRouteRequest) -> OptimizeRouteResponse:
+    """Solve the clusters of a decomposed request in parallel on the solver pool."""
+    parts = partition_request(req)
+    responses = await pool.map(solve_route, [(part,) for part in parts])
+    merged = merge_routes(parts, responses)
+    if req.improvement_seconds:
+        merged = await pool.run(improve_routes, req, merged)
+    return merged
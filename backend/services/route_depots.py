@@ -0,0 +1,73 @@
+#backend/services/route_depots.py
+"""
+Multi-depot route requests, solved as independent single-depot problems.
+
+Every depot has its own vehicles and stops; shared stops are given to their
+nearest depot first. Each depot then becomes an ordinary route request, and
+all of them are solved at the same time on the solver pool.
+"""
+import time
+
+from schemas.digipin_schemas import (
+    MultiDepotRouteRequest, MultiDepotRouteResponse, OptimizeRouteRequest, OptimizeRouteResponse
+)
+from services.route_decomposition import merge_routes, solve_decomposed
+from services.route_optimizer import decode_route_points, solve_route
+from utils.digipin import haversine_matrix
+
+
+def split_depots(req: MultiDepotRouteRequest) -> list:
+    """One single-depot request per depot, with the shared stops given to the nearest depot."""
+    options = req.model_dump(exclude={"depots", "locations"})
+    assigned = [list(fleet.locations) for fleet in req.depots]
+    if req.locations:
+        depot_lats, depot_lons = decode_route_points([fleet.depot for fleet in req.depots])
+        stop_lats, stop_lons = decode_route_points([loc.digipin for loc in req.locations])
+        nearest = haversine_matrix(stop_lats, stop_lons, depot_lats, depot_lons).argmin(axis=1)
+        for loc, depot in zip(req.locations, nearest.tolist()):
+            assigned[depot].append(loc)
+    return [
+        OptimizeRouteRequest(**options, depot=fleet.depot, vehicles=fleet.vehicles, locations=locations)
+        for fleet, locations in zip(req.depots, assigned)
+    ]
+
+
+def solve_depot(req: OptimizeRouteRequest) -> tuple:
+    """
+    Solve one depot's request in this process and time it. Decomposed
+    requests solve their clusters one after another here, since the depots
+    already share the pool between them. Returns (response, seconds).
+    """
+    started = time.perf_counter()
+    if not req.locations:
+        return OptimizeRouteResponse(routes=[]), 0.0
+    response = solve_decomposed(req) if req.decomposition is not None else solve_route(req)
+    return response, time.perf_counter() - started
+
+
+async def solve_depots_in_pool(pool, req: MultiDepotRouteRequest) -> MultiDepotRouteResponse:
+    """
+    Solve every depot of a multi-depot request in parallel on the solver
+    pool. Vehicles are numbered across depots in request order.
+    """
+    started = time.perf_counter()
+    parts = split_depots(req)
+    results = await pool.map(solve_depot, [(part,) for part in parts])
+    merged = merge_routes(parts, [response for response, _ in results])
+
+    depots = []
+    offset = 0
+    for part, (_, seconds) in zip(parts, results):
+        depots.append({
+            "depot": part.depot,
+            "vehicles": part.vehicles,
+            "stops": len(part.locations),
+            "vehicle_ids": [
+                route.vehicle_id for route in merged.routes if offset <= route.vehicle_id < offset + part.vehicles
+            ],
+            "solve_seconds": round(seconds, 3),
+        })
+        offset += part.vehicles
+    return MultiDepotRouteResponse(
+        routes=merged.routes, dropped=merged.dropped, depots=depots, elapsed_seconds=round(time.perf_counter() - started, 3)
+    )
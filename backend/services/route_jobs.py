@@ -0,0 +1,236 @@
+#backend/services/route_jobs.py
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Optional
+
+from config import ROUTE_JOBS_DB
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services.route_optimizer import solve_route, RouteOptimizationError
+from services.route_decomposition import solve_decomposed
+from services.solver_pool import get_solver_pool, SolverPoolFullError
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS route_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    objective INTEGER,
+    error TEXT,
+    owner_pid INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class RouteJobStore:
+    """
+    Route-optimization jobs in a local SQLite file.
+
+    The API worker and the solver processes open the same file, so job
+    status, the best solution found so far and cancel requests are shared
+    between them and survive a restart of either. Every call opens its own
+    short-lived connection; the store itself holds no open handles and can
+    be pickled into a solver process.
+    """
+
+    def __init__(self, path: str = ROUTE_JOBS_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _update(self, job_id: str, from_status: Optional[str] = None, **fields) -> bool:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        query = f"UPDATE route_jobs SET {columns} WHERE id = ?"
+        params = [*fields.values(), job_id]
+        if from_status is not None:
+            query += " AND status = ?"
+            params.append(from_status)
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+        return cursor.rowcount > 0
+
+    def create(self, req: OptimizeRouteRequest) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO route_jobs (id, status, request, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, req.model_dump_json(), os.getpid(), now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM route_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Flag an active job for cancellation. A job still in the queue is
+        cancelled at once; a running one stops at the solver's next check.
+        False if the job already finished.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE route_jobs SET cancel_requested = 1, updated_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (now, job_id, *ACTIVE_JOB_STATUSES)
+            )
+            conn.execute(
+                "UPDATE route_jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (JOB_CANCELLED, now, job_id, JOB_QUEUED)
+            )
+        return cursor.rowcount > 0
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM route_jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row["cancel_requested"])
+
+    def mark_running(self, job_id: str) -> bool:
+        return self._update(job_id, from_status=JOB_QUEUED, status=JOB_RUNNING)
+
+    def save_progress(self, job_id: str, result: dict, objective: int):
+        self._update(job_id, result=json.dumps(result), objective=objective)
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        fields = {"status": status, "error": error}
+        if result is not None:
+            fields["result"] = json.dumps(result)
+        self._update(job_id, **fields)
+
+    def claim_orphaned(self) -> list:
+        """
+        Take over active jobs whose owning API worker is no longer running,
+        for example after a restart, and return them as (id, request) pairs
+        so they can be queued again. Their best solution so far is kept.
+        """
+        claimed = []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, request, owner_pid FROM route_jobs WHERE status IN (?, ?)",
+                ACTIVE_JOB_STATUSES
+            ).fetchall()
+        for row in rows:
+            if _process_alive(row["owner_pid"]):
+                continue
+            if self._claim(row["id"], row["owner_pid"]):
+                claimed.append((row["id"], OptimizeRouteRequest.model_validate_json(row["request"])))
+        return claimed
+
+    def _claim(self, job_id: str, previous_owner: Optional[int]) -> bool:
+        # Compare-and-set on the owner so two restarting workers cannot both take a job
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE route_jobs SET status = ?, owner_pid = ?, updated_at = ? "
+                "WHERE id = ? AND owner_pid IS ? AND status IN (?, ?)",
+                (JOB_QUEUED, os.getpid(), time.time(), job_id, previous_owner, *ACTIVE_JOB_STATUSES)
+            )
+        return cursor.rowcount > 0
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_route_job(store: RouteJobStore, job_id: str, req: OptimizeRouteRequest) -> str:
+    """
+    Solve a stored job inside a solver process, recording every improving
+    solution and stopping early when the job is cancelled. Returns the final
+    job status.
+    """
+    if not store.mark_running(job_id):
+        # Cancelled while it was waiting in the queue
+        return store.get(job_id)["status"]
+
+    def on_solution(response, objective):
+        store.save_progress(job_id, response.model_dump(), objective)
+
+    # Decomposed jobs solve their clusters one after another in this process
+    solve = solve_route if req.decomposition is None else solve_decomposed
+    try:
+        response = solve(req, on_solution=on_solution, should_stop=lambda: store.cancel_requested(job_id))
+    except RouteOptimizationError as e:
+        store.finish(job_id, JOB_FAILED, error=str(e))
+        return JOB_FAILED
+
+    status = JOB_CANCELLED if store.cancel_requested(job_id) else JOB_COMPLETED
+    store.finish(job_id, status, result=response.model_dump())
+    return status
+
+
+_route_job_store = None
+
+
+def get_route_job_store() -> RouteJobStore:
+    """The process-wide job store, created on first use."""
+    global _route_job_store
+    if _route_job_store is None:
+        _route_job_store = RouteJobStore()
+    return _route_job_store
+
+
+def submit_route_job(job_id: str, req: OptimizeRouteRequest):
+    """
+    Queue a stored job on the solver pool. Raises SolverPoolFullError when
+    the pool cannot take it. Must be called from the event loop.
+    """
+    store = get_route_job_store()
+    future = get_solver_pool().submit(run_route_job, store, job_id, req)
+
+    def record_crash(future):
+        # A solver process that dies takes the job's own status update with it
+        if not future.cancelled() and future.exception() is not None:
+            store.finish(job_id, JOB_FAILED, error=f"Solver crashed: {future.exception()!r}")
+
+    future.add_done_callback(record_crash)
+
+
+def resume_orphaned_route_jobs():
+    """
+    Re-queue jobs left active by an API worker that has since exited. Jobs
+    that do not fit in the solver queue are marked failed.
+    """
+    for job_id, req in get_route_job_store().claim_orphaned():
+        try:
+            submit_route_job(job_id, req)
+        except SolverPoolFullError as e:
+            get_route_job_store().finish(job_id, JOB_FAILED, error=str(e))
@@ -0,0 +1,418 @@
+#backend/services/route_optimizer.py
+import time
+
+import numpy as np
+from ortools.constraint_solver import routing_enums_pb2, pywrapcp
+from schemas.digipin_schemas import DroppedStop,OptimizeRouteResponse,OptimizeRouteRequest,OptimizedRoute,RouteLocation
+from services.distance_providers import DistanceProviderError, build_distance_matrix, get_distance_provider
+from utils.digipin import get_lat_lng_from_digipin,decode_many,haversine,haversine_many,haversine_matrix
+from utils.digipin_knn import nearest_neighbors
+
+
+class RouteOptimizationError(ValueError):
+    """The request cannot be routed (bad DIGIPIN or no feasible solution)."""
+
+
+# How often (seconds) the search polls `should_stop`
+STOP_CHECK_INTERVAL = 0.25
+
+
+def decode_route_points(digipins: list) -> tuple:
+    """Latitude and longitude arrays for a list of DIGIPINs."""
+    lats, lons, valid = decode_many(digipins)
+    if not valid.all():
+        bad = digipins[int(np.argmin(valid))]
+        try:
+            # Reuse the scalar decoder's error message for the first bad code
+            get_lat_lng_from_digipin(bad)
+        except ValueError as e:
+            raise RouteOptimizationError(str(e))
+        raise RouteOptimizationError(f"Invalid DIGIPIN: {bad}")
+    return lats, lons
+
+
+# Minutes spent at every stop, added to the travel time of each arc
+SERVICE_MINUTES = 5
+
+# Longest a vehicle may be out, travel and service included
+SHIFT_MINUTES = 480
+
+# Reason given for stops the search left out of every route
+UNSERVED_REASON = "not served in the best solution found"
+
+
+def build_time_matrix(distance_matrix: np.ndarray) -> np.ndarray:
+    """
+    Travel time in minutes for every arc, plus a fixed service time.
+
+    Assumes an average speed of 30 km/h = 30000 meters / 60 minutes = 500
+    meters/minute, and 5 minutes of service time per stop.
+    """
+    return distance_matrix // 500 + SERVICE_MINUTES
+
+
+def find_unservable_stops(windows: np.ndarray, minutes_from_depot: np.ndarray, minutes_to_depot: np.ndarray) -> list:
+    """
+    Stops that no vehicle can serve, even on a route of their own. Arguments
+    are per-stop arrays: (n, 2) time windows, and the transit times (travel
+    plus service, in minutes) from the depot and back to it. Returns
+    `(stop, reason)` pairs; everything else is checked in one NumPy pass.
+    """
+    starts, ends = windows[:, 0], windows[:, 1]
+    # A vehicle may leave the depot at any time, so it arrives as soon as
+    # both the window and the drive allow, and must be back within the shift
+    earliest = np.maximum(starts, minutes_from_depot)
+    checks = [
+        (starts > ends, lambda i: "time window is empty"),
+        (starts > SHIFT_MINUTES, lambda i: f"time window opens after the {SHIFT_MINUTES}-minute shift"),
+        (minutes_from_depot > ends, lambda i: (
+            f"time window closes at minute {ends[i]}, but the stop is {minutes_from_depot[i]} minutes from the depot"
+        )),
+        (earliest + minutes_to_depot > SHIFT_MINUTES, lambda i: (
+            f"a vehicle serving it at minute {earliest[i]} cannot be back at the depot within the "
+            f"{SHIFT_MINUTES}-minute shift ({minutes_to_depot[i]} minutes away)"
+        )),
+    ]
+    unservable = {}
+    for failed, reason in checks:
+        for stop in np.flatnonzero(failed).tolist():
+            unservable.setdefault(stop, reason(stop))
+    return sorted(unservable.items())
+
+
+def register_sparse_transits(routing, manager, lats: np.ndarray, lons: np.ndarray, k: int, initial_routes=None) -> tuple:
+    """
+    Sparse arc model for very large requests: each stop may only be followed
+    by one of its `k` nearest stops or the depot, and the depot may go to
+    any stop. Only those O(n * k) arcs are stored, and the successor domain
+    of every stop is restricted to them, so the search never asks for any
+    other arc. Arcs used by `initial_routes` are always kept. Returns the
+    (distance, time) transit callback indices.
+
+    A dense matrix would need n * n entries on the C++ side, so these
+    transits are Python callbacks over a dict of the allowed arcs.
+    """
+    n = len(lats)
+    neighbors, neighbor_distances = nearest_neighbors(lats, lons, k)
+    depot_distances = haversine_matrix(lats[:1], lons[:1], lats, lons)[0].astype(np.int32)
+
+    # Keep each nearest-neighbor arc in both directions, so a stop can also
+    # be reached from the stops that have it among their nearest
+    from_nodes = np.repeat(np.arange(n, dtype=np.int64), neighbors.shape[1])
+    to_nodes = neighbors.ravel().astype(np.int64)
+    from_nodes, to_nodes = np.concatenate([from_nodes, to_nodes]), np.concatenate([to_nodes, from_nodes])
+    arc_distances = np.concatenate([neighbor_distances.ravel()] * 2)
+    route_arcs = [(a, b) for route in initial_routes or [] for a, b in zip(route, route[1:])]
+    if route_arcs:
+        route_from, route_to = np.array(route_arcs, dtype=np.int64).T
+        route_distances = haversine_many(lats[route_from], lons[route_from], lats[route_to], lons[route_to])
+        from_nodes = np.concatenate([from_nodes, route_from])
+        to_nodes = np.concatenate([to_nodes, route_to])
+        arc_distances = np.concatenate([arc_distances, route_distances.astype(np.int32)])
+
+    # Arcs keyed by from_node * n + to_node
+    arcs = dict(zip((from_nodes * n + to_nodes).tolist(), arc_distances.tolist()))
+    arcs.update(zip(range(n), depot_distances.tolist()))
+    arcs.update(zip(range(0, n * n, n), depot_distances.tolist()))
+    arcs.update(zip(range(0, n * n, n + 1), [0] * n))
+
+    def arc_distance(from_index, to_index):
+        from_node, to_node = manager.IndexToNode(from_index), manager.IndexToNode(to_index)
+        distance = arcs.get(from_node * n + to_node)
+        if distance is None:
+            distance = int(haversine(lats[from_node], lons[from_node], lats[to_node], lons[to_node]))
+        return distance
+
+    def distance_callback(from_index, to_index):
+        return arc_distance(from_index, to_index)
+
+    def time_callback(from_index, to_index):
+        # Same 500 meters/minute plus 5 minutes of service as build_time_matrix
+        return arc_distance(from_index, to_index) // 500 + 5
+
+    ends = [routing.End(vehicle) for vehicle in range(routing.vehicles())]
+    order = np.argsort(from_nodes, kind="stable")
+    successors = np.split(to_nodes[order], np.searchsorted(from_nodes[order], np.arange(1, n)))
+    for node in range(1, n):
+        index = manager.NodeToIndex(node)
+        allowed = {manager.NodeToIndex(other) for other in successors[node].tolist() if other != 0}
+        # A stop can also be its own successor, which is how OR-Tools marks it unvisited
+        routing.NextVar(index).SetValues(sorted(allowed) + ends + [index])
+
+    return routing.RegisterTransitCallback(distance_callback), routing.RegisterTransitCallback(time_callback)
+
+
+def solve_route(req: OptimizeRouteRequest, on_solution=None, should_stop=None, initial_routes=None) -> OptimizeRouteResponse:
+    """
+    Build and solve the OR-Tools routing model for a request. This is plain
+    synchronous, CPU-bound code: call it through the solver pool, never
+    directly from the event loop.
+
+    `on_solution(response, objective)` is called each time the search finds
+    a better solution. `should_stop()` is polled during the search; when it
+    returns True the search ends and the best solution so far is returned.
+
+    `initial_routes`, one list of node numbers per vehicle (see
+    `routes_to_nodes`), starts the local search from that assignment instead
+    of building a first solution. It falls back to a fresh solve when the
+    routes are not feasible for this request.
+
+    Dense requests take arc distances and travel times from
+    `req.distance_provider`; the sparse arc model always uses haversine.
+
+    The search budget and strategies come from `req.solver`. With
+    `plateau_seconds` set, the search also ends once the best solution has
+    not improved for that long.
+    """
+    all_points = [RouteLocation(digipin=req.depot, priority=1, time_window=(0, 9999))] + req.locations
+
+    lats, lons = decode_route_points([loc.digipin for loc in all_points])
+
+    if req.arc_model == "sparse":
+        depot_minutes = haversine_matrix(lats[:1], lons[:1], lats, lons)[0].astype(np.int32) // 500
+        minutes_from_depot = minutes_to_depot = depot_minutes + SERVICE_MINUTES
+    else:
+        try:
+            distance_matrix, travel_minutes = get_distance_provider(req.distance_provider).travel_matrices(
+                lats, lons, [loc.digipin for loc in all_points]
+            )
+        except DistanceProviderError as e:
+            raise RouteOptimizationError(str(e))
+        minutes_from_depot = travel_minutes[0] + SERVICE_MINUTES
+        minutes_to_depot = travel_minutes[:, 0] + SERVICE_MINUTES
+
+    # Leave stops that can never be served out of the model altogether,
+    # instead of making the search find out through their disjunctions
+    windows = np.array([loc.time_window for loc in all_points])
+    unservable = find_unservable_stops(windows[1:], minutes_from_depot[1:], minutes_to_depot[1:])
+    dropped = [DroppedStop(digipin=req.locations[stop].digipin, reason=reason) for stop, reason in unservable]
+    if unservable:
+        keep = np.ones(len(all_points), dtype=bool)
+        keep[[stop + 1 for stop, _ in unservable]] = False
+        nodes = np.flatnonzero(keep)
+        all_points = [all_points[node] for node in nodes.tolist()]
+        lats, lons = lats[nodes], lons[nodes]
+        if req.arc_model != "sparse":
+            distance_matrix = distance_matrix[np.ix_(nodes, nodes)]
+            travel_minutes = travel_minutes[np.ix_(nodes, nodes)]
+        if initial_routes is not None:
+            renumbered = np.cumsum(keep) - 1
+            initial_routes = [[int(renumbered[node]) for node in route if keep[node]] for route in initial_routes]
+
+    manager = pywrapcp.RoutingIndexManager(len(all_points), req.vehicles, 0)
+    routing = pywrapcp.RoutingModel(manager)
+
+    if req.arc_model == "sparse":
+        transit_callback_index, time_callback_index = register_sparse_transits(
+            routing, manager, lats, lons, req.neighbors, initial_routes
+        )
+    else:
+        time_matrix = travel_minutes + SERVICE_MINUTES
+        # Register both matrices natively so arc lookups during the search stay
+        # in C++ instead of calling back into Python. The SWIG wrapper only
+        # accepts nested lists; they are copied into the model and dropped here.
+        transit_callback_index = routing.RegisterTransitMatrix(distance_matrix.tolist())
+        time_callback_index = routing.RegisterTransitMatrix(time_matrix.tolist())
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    # Max slack (wait time) at a node, max cumulative time for the dimension.
+    # Set maximum travel time for a vehicle to 8 hours (480 minutes)
+    # 0 for `fix_start_cumul_to_zero` means the cumulative time at the depot starts at 0.
+    # AddDimension returns a bool, GetDimensionOrDie returns the dimension object.
+    routing.AddDimension(
+        time_callback_index,
+        30, # slack_max: allow vehicles to wait up to 30 minutes at a location if arriving early
+        SHIFT_MINUTES, # capacity: total travel time plus service time for a vehicle cannot exceed 480 minutes (8 hours)
+        False, # fix_start_cumul_to_zero: ensure the cumulative time at the depot (start node) is 0
+        "Time"
+    )
+    time_dim = routing.GetDimensionOrDie("Time") # Retrieve the dimension object
+
+    # Set time windows for each location. These values should now be in minutes.
+    for idx, loc in enumerate(all_points):
+        index = manager.NodeToIndex(idx)
+        start, end = loc.time_window
+        time_dim.CumulVar(index).SetRange(start, end)
+        
+    # Optional: Add a penalty for not visiting locations if you want to allow non-visits
+    # based on priorities. The current setup will try hard to visit all unless impossible.
+    for i, loc in enumerate(all_points[1:], 1): # Skip depot (index 0)
+        # Higher priority (1) means lower penalty for non-visit (more critical to visit).
+        # Lower priority (3) means higher penalty for non-visit (more flexible to skip).
+        # Using a large penalty makes it unlikely to skip unless no other solution exists.
+        penalty = (4 - loc.priority) * 1000000 # Increased penalty to strongly encourage visits
+        routing.AddDisjunction([manager.NodeToIndex(i)], penalty)
+
+    options = req.solver
+    search_params = pywrapcp.DefaultRoutingSearchParameters()
+    search_params.first_solution_strategy = getattr(
+        routing_enums_pb2.FirstSolutionStrategy, options.first_solution_strategy.upper())
+    search_params.local_search_metaheuristic = getattr(
+        routing_enums_pb2.LocalSearchMetaheuristic, options.local_search_metaheuristic.upper())
+    search_params.time_limit.FromSeconds(options.time_limit_seconds)
+    if options.solution_limit is not None:
+        search_params.solution_limit = options.solution_limit
+
+    best = {"objective": None, "at": time.monotonic()}
+    if on_solution is not None or options.plateau_seconds is not None:
+
+        def report_solution():
+            objective = routing.CostVar().Value()
+            if best["objective"] is None or objective < best["objective"]:
+                best["objective"] = objective
+                best["at"] = time.monotonic()
+                if on_solution is not None:
+                    on_solution(
+                        build_routes(req, all_points, routing, manager, lambda index: routing.NextVar(index).Value(), dropped),
+                        objective
+                    )
+
+        routing.AddAtSolutionCallback(report_solution)
+
+    if options.plateau_seconds is not None:
+        stop_requested_by_caller = should_stop
+
+        def should_stop():
+            if best["objective"] is not None and time.monotonic() - best["at"] > options.plateau_seconds:
+                return True
+            return stop_requested_by_caller is not None and stop_requested_by_caller()
+
+    if should_stop is not None:
+        last_check = {"at": 0.0}
+
+        def stop_requested():
+            now = time.monotonic()
+            if now - last_check["at"] < STOP_CHECK_INTERVAL:
+                return False
+            last_check["at"] = now
+            return bool(should_stop())
+
+        routing.AddSearchMonitor(routing.solver().CustomLimit(stop_requested))
+
+    solution = None
+    if initial_routes is not None:
+        routing.CloseModelWithParameters(search_params)
+        initial = routing.ReadAssignmentFromRoutes(
+            [[manager.NodeToIndex(node) for node in route] for route in initial_routes], True
+        )
+        if initial is not None:
+            solution = routing.SolveFromAssignmentWithParameters(initial, search_params)
+    if solution is None:
+        solution = routing.SolveWithParameters(search_params)
+    if not solution:
+        raise RouteOptimizationError("No solution found (consider adjusting time windows or capacities)")
+
+    return build_routes(req, all_points, routing, manager, lambda index: solution.Value(routing.NextVar(index)), dropped)
+
+
+def build_routes(req, all_points, routing, manager, next_index, dropped=()) -> OptimizeRouteResponse:
+    """
+    Turn a routing assignment into the API response. `next_index(index)`
+    returns the successor of a routing index, so this works both on a final
+    solution and from inside a solution callback. Stops of `all_points`
+    that no route visits are added to `dropped`.
+    """
+    visited = set()
+    routes = []
+    for v in range(req.vehicles):
+        index = routing.Start(v)
+        stops = []
+        # Add the depot as the starting stop
+        stops.append(all_points[manager.IndexToNode(index)].digipin) 
+        
+        while not routing.IsEnd(index):
+            node_index = manager.IndexToNode(index)
+            visited.add(node_index)
+            # Only add if it's not the starting depot again or the end depot
+            if node_index != 0 or (node_index == 0 and len(stops) == 0): 
+                stops.append(all_points[node_index].digipin)
+            index = next_index(index)
+        # Add the final depot stop if it's different from the initial one
+        if all_points[manager.IndexToNode(index)].digipin != stops[-1]:
+            stops.append(all_points[manager.IndexToNode(index)].digipin)
+        
+        # Ensure the route ends at the depot if it's not already there
+        if len(stops) > 1 and stops[-1] != req.depot:
+             stops.append(req.depot)
+
+        # Filter out consecutive duplicate depot stops for cleaner routes
+        final_stops = []
+        for i, stop in enumerate(stops):
+            if i == 0 or stop != final_stops[-1] or stop != req.depot:
+                final_stops.append(stop)
+            # Handle the case where the route might look like [depot, A, depot, depot]
+            # If the last stop is a duplicate depot and not the *only* stop, remove it
+            if i > 0 and stop == req.depot and final_stops[-2] == req.depot:
+                 final_stops.pop() # Remove the redundant second depot
+
+        routes.append(OptimizedRoute(vehicle_id=v, stops=final_stops))
+
+    # Post-processing to remove empty routes or routes with only depot
+    filtered_routes = []
+    for route in routes:
+        # A valid route should have at least the depot, then a location, then the depot again.
+        # Or if only one stop, it must be the depot, but this means no locations were visited.
+        # For this problem, we want to see actual stops.
+        if len(route.stops) > 1 and (len(route.stops) > 2 or route.stops[0] != route.stops[1]):
+            # Further refinement: if the route is just [depot, depot] and there were actual locations to visit,
+            # this route isn't useful for carrying locations.
+            # Only include if it contains more than just the depot and its return.
+            if len(set(route.stops)) > 1 or (len(route.stops) == 2 and route.stops[0] == req.depot and route.stops[1] == req.depot and len(req.locations) == 0):
+                 filtered_routes.append(route)
+        elif len(route.stops) == 1 and route.stops[0] == req.depot and len(req.locations) == 0:
+            # If there are no locations and only depot, include it as a valid empty route essentially
+            filtered_routes.append(route)
+
+    unserved = [
+        DroppedStop(digipin=loc.digipin, reason=UNSERVED_REASON)
+        for node, loc in enumerate(all_points[1:], 1) if node not in visited
+    ]
+    return OptimizeRouteResponse(routes=filtered_routes, dropped=list(dropped) + unserved)
+
+
+def routes_to_nodes(req: OptimizeRouteRequest, routes: list) -> list:
+    """
+    Map routes given as DIGIPIN stop lists back to node numbers of `req`
+    (0 is the depot, location i is node i + 1), dropping the depot and any
+    stop that is not in the request. Repeated DIGIPINs map to successive
+    locations, so every location is used at most once.
+    """
+    nodes_by_digipin = {}
+    for node, loc in enumerate(req.locations, 1):
+        nodes_by_digipin.setdefault(loc.digipin, []).append(node)
+    node_routes = []
+    for stops in routes:
+        nodes = []
+        for stop in stops:
+            if stop != req.depot and nodes_by_digipin.get(stop):
+                nodes.append(nodes_by_digipin[stop].pop(0))
+        node_routes.append(nodes)
+    return node_routes
+
+
+def apply_route_diff(req: OptimizeRouteRequest, routes: list, add: list, remove: list) -> tuple:
+    """
+    Apply an edit to a solved request: drop one location per DIGIPIN in
+    `remove` and append the `add` locations. Returns the edited request and
+    the previous `routes` (OptimizedRoute list) as initial routes for it;
+    removed stops are left out and added stops start unassigned.
+    """
+    removed = {}
+    for digipin in remove:
+        removed[digipin] = removed.get(digipin, 0) + 1
+    locations = []
+    for loc in req.locations:
+        if removed.get(loc.digipin):
+            removed[loc.digipin] -= 1
+        else:
+            locations.append(loc)
+    missing = [digipin for digipin, count in removed.items() if count]
+    if missing:
+        raise RouteOptimizationError(f"Stops to remove are not in the request: {', '.join(missing)}")
+
+    edited = req.model_copy(update={"locations": locations + list(add), "decomposition": None})
+    initial_routes = [[] for _ in range(edited.vehicles)]
+    for route, nodes in zip(routes, routes_to_nodes(edited, [route.stops for route in routes])):
+        if route.vehicle_id < edited.vehicles:
+            initial_routes[route.vehicle_id] = nodes
+    return edited, initial_routes
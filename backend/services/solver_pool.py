@@ -0,0 +1,94 @@
+#backend/services/solver_pool.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import SOLVER_POOL_SIZE, SOLVER_QUEUE_DEPTH
+
+
+class SolverPoolFullError(RuntimeError):
+    """Every solver process is busy and the wait queue is full."""
+
+
+class SolverPool:
+    """
+    A bounded process pool for CPU-bound solver work.
+
+    At most `size` jobs run at once, one per process, and at most
+    `queue_depth` more wait for a free process. Anything beyond that is
+    rejected immediately with SolverPoolFullError instead of piling up.
+    Processes are started with "spawn" so they never inherit the event loop
+    or open sockets of the API worker.
+    """
+
+    def __init__(self, size: int = SOLVER_POOL_SIZE, queue_depth: int = SOLVER_QUEUE_DEPTH):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        """
+        Queue `fn(*args)` in a solver process without waiting for it. The
+        returned future counts against the queue until it finishes.
+        """
+        if self.pending >= self.size + self.queue_depth:
+            raise SolverPoolFullError("Route solver is busy, try again shortly")
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        self.pending -= 1
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` in a solver process and await its result."""
+        return await self.submit(fn, *args)
+
+    async def map(self, fn, args_list: list) -> list:
+        """
+        Run `fn(*args)` for every entry of `args_list` across the solver
+        processes and return the results in order. The whole batch is
+        admitted as a single queue entry; its parts share the processes
+        with other work.
+        """
+        if self.pending >= self.size + self.queue_depth:
+            raise SolverPoolFullError("Route solver is busy, try again shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*[loop.run_in_executor(self.executor, fn, *args) for args in args_list])
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_solver_pool = None
+
+
+def get_solver_pool() -> SolverPool:
+    """The process-wide solver pool, created on first use."""
+    global _solver_pool
+    if _solver_pool is None:
+        _solver_pool = SolverPool()
+    return _solver_pool
+
+
+def shutdown_solver_pool():
+    global _solver_pool
+    if _solver_pool is not None:
+        _solver_pool.shutdown()
+        _solver_pool = None
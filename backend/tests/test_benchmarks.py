@@ -0,0 +1,55 @@
+from benchmarks.route_corpus import CORPUS, WINDOW_MINUTES, select_instances
+from benchmarks.run_benchmarks import compare
+from benchmarks.run_route_benchmarks import compare as compare_routes
+from utils.digipin import BOUNDS, decode_many
+
+
+def test_compare_flags_only_drops_past_threshold():
+    baseline = {"batch_encode": 1000.0, "batch_decode": 1000.0, "removed": 10.0}
+    results = {"batch_encode": 700.0, "batch_decode": 900.0, "added": 5.0}
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    assert [name for name, *_ in regressions] == ["batch_encode"]
+
+
+def test_route_corpus_is_reproducible_and_in_bounds():
+    assert min(instance.stops for instance in CORPUS) == 10
+    assert max(instance.stops for instance in CORPUS) == 10000
+    assert {instance.tightness for instance in CORPUS} == set(WINDOW_MINUTES)
+
+    for instance in select_instances(max_stops=250):
+        req = instance.request()
+        assert req == instance.request()
+        assert len(req.locations) == instance.stops and req.vehicles == instance.vehicles
+        lats, lons, valid = decode_many([req.depot] + [loc.digipin for loc in req.locations])
+        assert valid.all()
+        assert (lats >= BOUNDS["minLat"]).all() and (lats <= BOUNDS["maxLat"]).all()
+        assert (lons >= BOUNDS["minLon"]).all() and (lons <= BOUNDS["maxLon"]).all()
+        assert all(end - start == WINDOW_MINUTES[instance.tightness] for start, end in (loc.time_window for loc in req.locations))
+    assert [instance.name for instance in select_instances(names=["tiny-10-loose"])] == ["tiny-10-loose"]
+
+
+def test_route_compare_flags_time_memory_objective_and_drops():
+    def result(seconds, objective, dropped, peak_rss_mb=100.0):
+        return {"seconds": seconds, "objective": objective, "dropped": dropped, "peak_rss_mb": peak_rss_mb}
+
+    baseline = {
+        "fast": result(0.1, 1000, 0),
+        "slow": result(10.0, 1000, 0),
+        "worse": result(10.0, 1000, 0),
+        "bigger": result(10.0, 1000, 1),
+        "removed": result(10.0, 1000, 0),
+    }
+    results = {
+        "fast": result(0.3, 1010, 0),
+        "slow": result(13.0, 1000, 0),
+        "worse": result(10.0, 1030, 0),
+        "bigger": result(10.0, 1000, 2, peak_rss_mb=200.0),
+    }
+
+    regressions = compare_routes(results, baseline, threshold=0.25, objective_threshold=0.02)
+
+    assert sorted((name, metric) for name, metric, *_ in regressions) == [
+        ("bigger", "dropped"), ("bigger", "peak_rss_mb"), ("slow", "seconds"), ("worse", "objective")
+    ]
@@ -1,3 +1,5 @@
+import csv
+import json
 import pytest
 from httpx import AsyncClient
 from fastapi import status
@@ -83,3 +85,102 @@ async def test_optimize_route_basic():
     data = response.json()
     assert "routes" in data
     assert isinstance(data["routes"], list)
+
+
+@pytest.mark.asyncio
+async def test_get_digipins_batch():
+    points = [{"lat": 17.385, "lng": 78.4867}, {"lat": 40.0, "lng": 78.0}, {"lat": 20.0, "lng": 60.0}]
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/digipin/batch", json={"points": points})
+        single = await ac.get("/api/digipin", params={"lat": 17.385, "lng": 78.4867})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {"digipin": single.json()["digipin"], "error": None}
+    assert results[1]["error"] == "Latitude out of range"
+    assert results[2]["error"] == "Longitude out of range"
+
+
+@pytest.mark.asyncio
+async def test_get_latlngs_batch():
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/latlng/batch", json={"digipins": ["5J2-CTF-456L", "BAD"]})
+        single = await ac.get("/api/latlng", params={"digipin": "5J2-CTF-456L"})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {**single.json(), "error": None}
+    assert results[1]["latitude"] is None and results[1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit():
+    from config import DIGIPIN_BATCH_MAX_ITEMS
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        too_many = await ac.post("/api/latlng/batch", json={"digipins": ["5J2-CTF-456L"] * (DIGIPIN_BATCH_MAX_ITEMS + 1)})
+        too_long = await ac.post("/api/latlng/batch", json={"digipins": ["5J2-CTF-456L" * 100]})
+    assert too_many.status_code == 422
+    assert too_long.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stream_digipins_ndjson():
+    async def body():
+        yield b'{"lat": 17.385, "lng": 78.4867}\n{"lat": 40'
+        yield b', "lng": 78.0}\nnot json\n'
+
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/digipin/stream", params={"format": "ndjson"}, content=body())
+        single = await ac.get("/api/digipin", params={"lat": 17.385, "lng": 78.4867})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"lat": 17.385, "lng": 78.4867, "digipin": single.json()["digipin"]}
+    assert lines[1]["error"] == "Latitude out of range"
+    assert lines[2] == {"error": "Invalid input line"}
+
+
+@pytest.mark.asyncio
+async def test_stream_latlngs_csv():
+    body = "digipin\n5J2-CTF-456L\nBAD\n"
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/latlng/stream", params={"format": "csv"}, content=body)
+        single = await ac.get("/api/latlng", params={"digipin": "5J2-CTF-456L"})
+    assert response.status_code == 200
+    rows = list(csv.reader(response.text.splitlines()))
+    assert rows[0] == ["digipin", "latitude", "longitude", "error"]
+    assert rows[1] == ["5J2-CTF-456L", str(single.json()["latitude"]), str(single.json()["longitude"]), ""]
+    assert rows[2][0] == "BAD" and rows[2][3]
+
+
+@pytest.mark.asyncio
+async def test_stream_digipins_csv_with_header():
+    body = "lat,lng\n17.385,78.4867\n20.0,60.0\n"
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/digipin/stream", params={"format": "csv"}, content=body)
+        single = await ac.get("/api/digipin", params={"lat": 17.385, "lng": 78.4867})
+    assert response.status_code == 200
+    rows = list(csv.reader(response.text.splitlines()))
+    assert rows[0] == ["lat", "lng", "digipin", "error"]
+    assert rows[1] == ["17.385", "78.4867", single.json()["digipin"], ""]
+    assert rows[2] == ["20.0", "60.0", "", "Longitude out of range"]
+    assert len(rows) == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_rejects_unknown_format():
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/digipin/stream", params={"format": "xml"}, content="17.385,78.4867\n")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stream_digipins_large_body_and_bad_lines():
+    good = b'{"lat": 17.385, "lng": 78.4867}\n' * 20000
+    body = good + b'{"lat": 1' + b"0" * 400 + b', "lng": 78}\n' + b"x" * 5000 + b"\n" + b'{"lat": 20, "lng": 80}'
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/digipin/stream", content=body)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 20003
+    assert all("digipin" in line for line in lines[:20000])
+    assert lines[20000] == {"error": "Invalid input line"}
+    assert lines[20001] == {"error": "Line too long"}
+    assert "digipin" in lines[20002]
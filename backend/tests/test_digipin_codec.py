@@ -0,0 +1,159 @@
+import numpy as np
+
+import math
+
+import pytest
+
+from utils.digipin import (
+    get_digipin, get_lat_lng_from_digipin, encode_many, decode_many,
+    digipin_to_int, int_to_digipin, encode_int, decode_int, latlng_to_grid, int_to_grid,
+)
+
+
+def test_encode_many_matches_get_digipin():
+    rng = np.random.default_rng(42)
+    lats = np.concatenate([rng.uniform(2.5, 38.5, 2000), [2.5, 38.5, 17.385]])
+    lons = np.concatenate([rng.uniform(63.5, 99.5, 2000), [63.5, 99.5, 78.4867]])
+
+    codes, valid = encode_many(lats, lons)
+
+    assert valid.all()
+    assert list(codes) == [get_digipin(lat, lon) for lat, lon in zip(lats, lons)]
+
+
+def test_encode_many_masks_invalid_rows():
+    codes, valid = encode_many([17.385, 1.0, np.nan, 20.0], [78.4867, 78.0, 78.0, 120.0])
+
+    assert valid.tolist() == [True, False, False, False]
+    assert codes[0] == get_digipin(17.385, 78.4867)
+    assert codes[1:].tolist() == ["", "", ""]
+
+
+def test_decode_many_matches_get_lat_lng_from_digipin():
+    rng = np.random.default_rng(7)
+    codes, _ = encode_many(rng.uniform(2.5, 38.5, 2000), rng.uniform(63.5, 99.5, 2000))
+    codes = np.concatenate([codes, ["4FKPC3M5P6", "4-FK-PC3M-5P6"]])
+
+    lats, lons, valid = decode_many(codes)
+
+    assert valid.all()
+    for code, lat, lon in zip(codes, lats, lons):
+        assert get_lat_lng_from_digipin(code) == {"latitude": lat, "longitude": lon}
+
+
+def test_decode_many_masks_invalid_rows():
+    lats, lons, valid = decode_many(["5J2-CTF-456L", "5J2-CTF-456", "5J2-CTF-456A", "5J2-CTF-456LL", "é" * 10])
+
+    assert valid.tolist() == [True, False, False, False, False]
+    assert np.isnan(lats[1:]).all() and np.isnan(lons[1:]).all()
+
+
+def test_decode_many_rejects_nul_and_oversized_input():
+    lats, lons, valid = decode_many(["5J2\x00CTF456L", "5J2CTF456L\x00", "5J2-CTF-456L" + "-" * 20, "5J2-CTF-456L"])
+
+    assert valid.tolist() == [False, False, False, True]
+
+
+def test_packed_int_round_trip_and_matches_string_codec():
+    rng = np.random.default_rng(11)
+    cell = 36 / 4 ** 10
+    # Random points plus points one ulp either side of cell edges
+    edges = 2.5 + rng.integers(0, 4 ** 10, 500) * cell
+    lats = np.concatenate([rng.uniform(2.5, 38.5, 1000), [math.nextafter(e, 0) for e in edges], edges, [2.5, 38.5]])
+    lons = np.concatenate([rng.uniform(63.5, 99.5, 1000), edges + 61, [math.nextafter(e + 61, 0) for e in edges], [63.5, 99.5]])
+
+    for lat, lon in zip(lats, lons):
+        code = get_digipin(lat, lon)
+        value = encode_int(lat, lon)
+        assert int_to_digipin(value) == code
+        assert digipin_to_int(code) == value
+        assert decode_int(value) == get_lat_lng_from_digipin(code)
+        assert int_to_grid(value) == latlng_to_grid(lat, lon)
+
+
+def test_packed_int_preserves_prefix_order():
+    assert digipin_to_int("FFF-FFF-FFFF") == 0
+    assert digipin_to_int("TTT-TTT-TTTT") == (1 << 40) - 1
+    low, high = digipin_to_int("4FK-FFF-FFFF"), digipin_to_int("4FK-TTT-TTTT")
+    assert low <= digipin_to_int("4FK-PC3-M5P6") <= high
+
+
+def test_packed_int_rejects_invalid_input():
+    with pytest.raises(ValueError):
+        digipin_to_int("4FK-PC3-M5PA")
+    with pytest.raises(ValueError):
+        int_to_digipin(1 << 40)
+    with pytest.raises(ValueError):
+        encode_int(40.0, 78.0)
+
+
+def test_table_driven_codec_matches_reference():
+    from utils.digipin_reference import reference_get_digipin, reference_get_lat_lng_from_digipin
+
+    rng = np.random.default_rng(5)
+    for lat, lon in zip(rng.uniform(2.5, 38.5, 2000), rng.uniform(63.5, 99.5, 2000)):
+        code = get_digipin(lat, lon)
+        assert code == reference_get_digipin(lat, lon)
+        assert get_lat_lng_from_digipin(code) == reference_get_lat_lng_from_digipin(code)
+    for bad in ("4FK-PC3-M5P", "4FK-PC3-M5PA"):
+        with pytest.raises(ValueError):
+            get_lat_lng_from_digipin(bad)
+
+
+def test_variable_precision_encode_is_prefix_of_full_code():
+    from utils.digipin import format_digipin
+
+    full = get_digipin(17.385, 78.4867).replace("-", "")
+    for level in range(1, 11):
+        assert get_digipin(17.385, 78.4867, level) == format_digipin(full[:level])
+    assert get_digipin(17.385, 78.4867, 5) == full[:3] + "-" + full[3:5]
+    with pytest.raises(ValueError):
+        get_digipin(17.385, 78.4867, 11)
+
+
+def test_digipin_bounds_contain_encoded_points():
+    from utils.digipin import get_digipin_bounds, is_point_in_digipin, BOUNDS
+
+    rng = np.random.default_rng(3)
+    for lat, lon in zip(rng.uniform(2.5, 38.5, 500), rng.uniform(63.5, 99.5, 500)):
+        code = get_digipin(lat, lon)
+        for level in (1, 4, 10):
+            prefix = get_digipin(lat, lon, level)
+            bounds = get_digipin_bounds(prefix)
+            assert bounds["minLat"] <= lat <= bounds["maxLat"]
+            assert bounds["minLon"] <= lon <= bounds["maxLon"]
+            assert is_point_in_digipin(lat, lon, prefix)
+        center = get_lat_lng_from_digipin(code)
+        bounds = get_digipin_bounds(code)
+        assert round((bounds["minLat"] + bounds["maxLat"]) / 2, 6) == center["latitude"]
+
+    assert get_digipin_bounds("F")["maxLat"] == BOUNDS["maxLat"]
+    assert get_digipin_bounds("T")["maxLon"] == BOUNDS["maxLon"]
+    assert not is_point_in_digipin(17.385, 78.4867, "F")
+
+
+def test_neighbors_match_shifted_encode():
+    from utils.digipin import get_digipin_neighbors, get_digipin_bounds
+
+    code = get_digipin(17.385, 78.4867)
+    bounds = get_digipin_bounds(code)
+    height = bounds["maxLat"] - bounds["minLat"]
+    width = bounds["maxLon"] - bounds["minLon"]
+    lat = (bounds["minLat"] + bounds["maxLat"]) / 2
+    lon = (bounds["minLon"] + bounds["maxLon"]) / 2
+    steps = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+    expected = [get_digipin(lat + d_lat * height, lon + d_lon * width) for d_lat, d_lon in steps]
+
+    assert get_digipin_neighbors(code) == expected
+
+
+def test_neighbors_and_rings_at_the_edges():
+    from utils.digipin import get_digipin_neighbors, get_digipin_k_ring
+
+    # "F" is the north-west level-1 cell, "FFF-FFF-FFFF" its level-10 corner
+    assert sorted(get_digipin_neighbors("F")) == ["3", "C", "J"]
+    assert len(get_digipin_neighbors("FFF-FFF-FFFF")) == 3
+    assert len(get_digipin_neighbors("4")) == 8
+    assert len(get_digipin_k_ring("4", 1)) == 9
+    assert len(get_digipin_k_ring("F", 5)) == 16
+    assert get_digipin_k_ring("4FK-PC3", 0) == ["4FK-PC3"]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from utils.digipin import get_digipin, get_digipin_bounds, digipin_to_int
+from utils.digipin_cover import cover_bbox, cover_polygon, digipin_prefix_range
+
+
+def covering_prefix(cover, lat, lon):
+    code = get_digipin(lat, lon).replace("-", "")
+    matches = [cell for cell in cover if code.startswith(cell["prefix"].replace("-", ""))]
+    assert len(matches) <= 1
+    return matches[0] if matches else None
+
+
+def test_cover_bbox_covers_every_point_within_limits():
+    cover = cover_bbox(17.3, 78.3, 17.5, 78.6, max_cells=40, max_level=7)
+
+    assert len(cover) <= 40
+    assert all(len(cell["prefix"].replace("-", "")) <= 7 for cell in cover)
+    rng = np.random.default_rng(1)
+    for lat, lon in zip(rng.uniform(17.3, 17.5, 500), rng.uniform(78.3, 78.6, 500)):
+        assert covering_prefix(cover, lat, lon) is not None
+    for cell in cover:
+        if cell["full"]:
+            bounds = get_digipin_bounds(cell["prefix"])
+            assert 17.3 <= bounds["minLat"] and bounds["maxLat"] <= 17.5
+            assert 78.3 <= bounds["minLon"] and bounds["maxLon"] <= 78.6
+
+
+def test_cover_polygon_marks_full_and_partial_cells():
+    triangle = [(17.3, 78.3), (17.6, 78.45), (17.3, 78.6)]
+    cover = cover_polygon(triangle, max_cells=200, max_level=8)
+
+    assert len(cover) <= 200
+    assert any(cell["full"] for cell in cover) and any(not cell["full"] for cell in cover)
+    rng = np.random.default_rng(2)
+    for lat, lon in zip(rng.uniform(17.3, 17.6, 2000), rng.uniform(78.3, 78.6, 2000)):
+        inside = (lat - 17.3) < 2 * min(lon - 78.3, 78.6 - lon)
+        cell = covering_prefix(cover, lat, lon)
+        if inside:
+            assert cell is not None
+        elif cell is not None:
+            assert not cell["full"]
+
+
+def test_prefix_range_contains_exactly_the_prefix_codes():
+    low, high = digipin_prefix_range("4FK-P")
+    assert low <= digipin_to_int("4FK-PC3-M5P6") < high
+    assert not low <= digipin_to_int("4FK-CC3-M5P6") < high
+    assert high - low == 16 ** 6
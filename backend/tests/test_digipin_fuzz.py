@@ -0,0 +1,218 @@
+"""
+Seeded differential fuzzing of every DIGIPIN codec path against the original
+loop-based implementation in utils.digipin_reference.
+
+Knobs (environment variables) for longer runs, e.g. nightly:
+- DIGIPIN_FUZZ_SEED: random seed (default 20240601)
+- DIGIPIN_FUZZ_POINTS: points for the vectorized cross-check (default 1,000,000)
+- DIGIPIN_FUZZ_SCALAR_POINTS: points checked against the scalar reference (default 20,000)
+
+A failure names the seed and a minimized coordinate or code that reproduces it.
+"""
+import math
+import os
+
+import numpy as np
+
+from utils.digipin import (
+    BOUNDS, DIGIPIN_GRID, DIGIPIN_GRID_SIZE, get_digipin, get_lat_lng_from_digipin,
+    encode_many, decode_many, encode_int, decode_int, int_to_digipin, digipin_to_int,
+)
+from utils.digipin_reference import reference_get_digipin, reference_get_lat_lng_from_digipin
+
+SEED = int(os.getenv("DIGIPIN_FUZZ_SEED", 20240601))
+POINTS = int(os.getenv("DIGIPIN_FUZZ_POINTS", 1_000_000))
+SCALAR_POINTS = int(os.getenv("DIGIPIN_FUZZ_SCALAR_POINTS", 20_000))
+SYMBOLS = "".join("".join(row) for row in DIGIPIN_GRID)
+
+
+def outcome(func, *args):
+    """Result of `func(*args)`, or the exception type name, for comparison."""
+    try:
+        return func(*args)
+    except ValueError as e:
+        return type(e).__name__
+
+
+def encode_paths(lat, lon):
+    codes, valid = encode_many([lat], [lon])
+    return {
+        "get_digipin": outcome(get_digipin, lat, lon),
+        "encode_many": codes[0] if valid[0] else "ValueError",
+        "encode_int": outcome(lambda: int_to_digipin(encode_int(lat, lon))),
+    }
+
+
+def decode_paths(code):
+    lats, lons, valid = decode_many([code])
+    return {
+        "get_lat_lng_from_digipin": outcome(get_lat_lng_from_digipin, code),
+        "decode_many": {"latitude": lats[0], "longitude": lons[0]} if valid[0] else "ValueError",
+        "decode_int": outcome(lambda: decode_int(digipin_to_int(code))),
+    }
+
+
+def encode_mismatch(lat, lon):
+    expected = outcome(reference_get_digipin, lat, lon)
+    return {name: got for name, got in encode_paths(lat, lon).items() if got != expected}
+
+
+def decode_mismatch(code):
+    expected = outcome(reference_get_lat_lng_from_digipin, code)
+    return {name: got for name, got in decode_paths(code).items() if got != expected}
+
+
+def minimize_point(lat, lon):
+    """Round the coordinate to as few decimals as still reproduce the mismatch."""
+    for digits in range(0, 18):
+        candidate = (round(lat, digits), round(lon, digits))
+        if encode_mismatch(*candidate):
+            return candidate
+    return lat, lon
+
+
+def minimize_code(code):
+    """Drop hyphens and trailing characters while the mismatch persists."""
+    for candidate in (code.replace("-", ""), code):
+        while len(candidate) > 1 and decode_mismatch(candidate[:-1]):
+            candidate = candidate[:-1]
+        if decode_mismatch(candidate):
+            return candidate
+    return code
+
+
+def report_encode(lat, lon):
+    lat, lon = minimize_point(lat, lon)
+    return (
+        f"seed={SEED}: encode({lat!r}, {lon!r}) reference="
+        f"{outcome(reference_get_digipin, lat, lon)!r} mismatches={encode_mismatch(lat, lon)!r}"
+    )
+
+
+def report_decode(code):
+    code = minimize_code(code)
+    return (
+        f"seed={SEED}: decode({code!r}) reference="
+        f"{outcome(reference_get_lat_lng_from_digipin, code)!r} mismatches={decode_mismatch(code)!r}"
+    )
+
+
+def boundary_points(rng, n):
+    """Points on, and one ulp either side of, cell edges at random levels, plus BOUNDS edges."""
+    levels = rng.integers(1, 11, n)
+    lat_edges = BOUNDS["minLat"] + rng.integers(0, 4 ** levels + 1) * (36 / 4.0 ** levels)
+    lon_edges = BOUNDS["minLon"] + rng.integers(0, 4 ** levels + 1) * (36 / 4.0 ** levels)
+    nudge = rng.integers(-1, 2, (2, n))
+    lats = np.where(nudge[0] < 0, np.nextafter(lat_edges, -np.inf), np.where(nudge[0] > 0, np.nextafter(lat_edges, np.inf), lat_edges))
+    lons = np.where(nudge[1] < 0, np.nextafter(lon_edges, -np.inf), np.where(nudge[1] > 0, np.nextafter(lon_edges, np.inf), lon_edges))
+
+    extremes = []
+    for lat in (BOUNDS["minLat"], BOUNDS["maxLat"]):
+        for lon in (BOUNDS["minLon"], BOUNDS["maxLon"]):
+            for d_lat in (-math.inf, 0, math.inf):
+                for d_lon in (-math.inf, 0, math.inf):
+                    extremes.append((
+                        math.nextafter(lat, d_lat) if d_lat else lat,
+                        math.nextafter(lon, d_lon) if d_lon else lon,
+                    ))
+    extremes += [(math.nan, 78.0), (17.0, math.nan), (math.inf, 78.0)]
+    return list(zip(lats.tolist(), lons.tolist())) + extremes
+
+
+def random_codes(rng, n):
+    """Mostly valid codes, hyphenated or not, plus wrong lengths and bad symbols."""
+    symbols = np.array(list(SYMBOLS + "AB0-"))
+    picks = rng.integers(0, 16, (n, 10))
+    bad = rng.random(n) < 0.1
+    picks[bad, rng.integers(0, 10, bad.sum())] = rng.integers(16, 20, bad.sum())
+    codes = ["".join(row) for row in symbols[picks]]
+    for i in range(0, n, 7):
+        codes[i] = codes[i][:3] + "-" + codes[i][3:6] + "-" + codes[i][6:]
+    for i in range(3, n, 50):
+        codes[i] = codes[i][: rng.integers(0, 10)]
+    return codes
+
+
+def test_scalar_encode_paths_match_reference():
+    rng = np.random.default_rng(SEED)
+    half = SCALAR_POINTS // 2
+    points = list(zip(rng.uniform(2.4, 38.6, half).tolist(), rng.uniform(63.4, 99.6, half).tolist()))
+    points += boundary_points(rng, SCALAR_POINTS - half)
+    codes, valid = encode_many(*zip(*points))
+
+    for (lat, lon), code, ok in zip(points, codes.tolist(), valid.tolist()):
+        expected = outcome(reference_get_digipin, lat, lon)
+        if (
+            (code if ok else "ValueError") != expected
+            or outcome(get_digipin, lat, lon) != expected
+            or outcome(lambda: int_to_digipin(encode_int(lat, lon))) != expected
+        ):
+            raise AssertionError(report_encode(lat, lon))
+
+
+def test_scalar_decode_paths_match_reference():
+    rng = np.random.default_rng(SEED + 1)
+    codes = random_codes(rng, SCALAR_POINTS)
+    lats, lons, valid = decode_many(codes)
+
+    for code, lat, lon, ok in zip(codes, lats.tolist(), lons.tolist(), valid.tolist()):
+        expected = outcome(reference_get_lat_lng_from_digipin, code)
+        if (
+            ({"latitude": lat, "longitude": lon} if ok else "ValueError") != expected
+            or outcome(get_lat_lng_from_digipin, code) != expected
+            or outcome(lambda: decode_int(digipin_to_int(code))) != expected
+        ):
+            raise AssertionError(report_decode(code))
+
+
+def test_vectorized_encode_matches_exact_grid_on_many_points():
+    """encode_many (level-by-level floats) against exact integer cell indices."""
+    rng = np.random.default_rng(SEED + 2)
+    half = POINTS // 2
+    boundary = np.array(boundary_points(rng, POINTS - half)).T
+    lats = np.concatenate([rng.uniform(2.5, 38.5, half), boundary[0]])
+    lons = np.concatenate([rng.uniform(63.5, 99.5, half), boundary[1]])
+
+    codes, valid = encode_many(lats, lons)
+
+    def exact_index(values, minimum):
+        cell = 36 / DIGIPIN_GRID_SIZE
+        index = np.floor((values - minimum) / cell).astype(np.int64)
+        index -= values < minimum + index * cell
+        index += values >= minimum + (index + 1) * cell
+        return np.clip(index, 0, DIGIPIN_GRID_SIZE - 1)
+
+    in_bounds = (
+        (lats >= BOUNDS["minLat"]) & (lats <= BOUNDS["maxLat"])
+        & (lons >= BOUNDS["minLon"]) & (lons <= BOUNDS["maxLon"])
+    )
+    assert (valid == in_bounds).all(), report_encode(*np.array([lats, lons]).T[valid != in_bounds][0])
+
+    lat_index = exact_index(np.where(valid, lats, 2.5), BOUNDS["minLat"])
+    lon_index = exact_index(np.where(valid, lons, 63.5), BOUNDS["minLon"])
+
+    # Cell indices spelled out by the codes, via a byte -> (row, col) table
+    table = np.full((256, 2), -1, dtype=np.int64)
+    for cell, symbol in enumerate(SYMBOLS):
+        table[ord(symbol)] = divmod(cell, 4)
+    chars = codes[valid].astype("S12").view(np.uint8).reshape(-1, 12)[:, [0, 1, 2, 4, 5, 6, 8, 9, 10, 11]]
+    positions = table[chars]
+    weights = 4 ** np.arange(9, -1, -1)
+    row_from_code = positions[:, :, 0] @ weights
+    col_from_code = positions[:, :, 1] @ weights
+
+    bad = (DIGIPIN_GRID_SIZE - 1 - row_from_code != lat_index[valid]) | (col_from_code != lon_index[valid])
+    if bad.any():
+        raise AssertionError(report_encode(lats[valid][bad][0], lons[valid][bad][0]))
+
+
+def test_vectorized_decode_round_trips_on_many_points():
+    rng = np.random.default_rng(SEED + 3)
+    codes, _ = encode_many(rng.uniform(2.5, 38.5, POINTS), rng.uniform(63.5, 99.5, POINTS))
+
+    lats, lons, valid = decode_many(codes)
+    assert valid.all()
+    recoded, _ = encode_many(lats, lons)
+    bad = recoded != codes
+    if bad.any():
+        raise AssertionError(report_decode(str(codes[bad][0])))
@@ -0,0 +1,106 @@
+import numpy as np
+
+from services import distance_cache, distance_providers
+from services.distance_cache import DistanceCache
+from services.distance_providers import HaversineProvider
+from services.route_optimizer import build_distance_matrix, decode_route_points
+from utils.digipin import digipin_to_int, get_digipin, haversine_many
+
+
+def make_points(n, seed=3):
+    rng = np.random.default_rng(seed)
+    digipins = [get_digipin(17.385 + dlat, 78.4867 + dlon) for dlat, dlon in rng.uniform(-0.2, 0.2, (n, 2))]
+    lats, lons = decode_route_points(digipins)
+    return digipins, lats, lons
+
+
+class CountingHaversine:
+    def __init__(self, lats, lons):
+        self.lats, self.lons = lats, lons
+        self.pairs = 0
+
+    def __call__(self, from_nodes, to_nodes):
+        self.pairs += len(from_nodes)
+        meters = haversine_many(self.lats[from_nodes], self.lons[from_nodes], self.lats[to_nodes], self.lons[to_nodes])
+        return meters, meters // 500
+
+
+def test_cached_matrix_matches_direct_and_only_computes_new_pairs():
+    digipins, lats, lons = make_points(60)
+    cache = DistanceCache(size=100000, path=None)
+    compute = CountingHaversine(lats, lons)
+    codes = [digipin_to_int(digipin) for digipin in digipins]
+
+    meters, minutes = cache.matrix(codes[:50], compute)
+    assert (meters == build_distance_matrix(lats[:50], lons[:50])).all()
+    assert (minutes == meters // 500).all()
+    assert compute.pairs == 50 * 49
+
+    # Ten new stops: only pairs touching them are computed
+    meters, minutes = cache.matrix(codes, compute)
+    assert (meters == build_distance_matrix(lats, lons)).all()
+    assert compute.pairs == 50 * 49 + 60 * 59 - 50 * 49
+    stats = cache.stats()
+    assert stats["memory_hits"] == 50 * 49 and stats["misses"] == 60 * 59
+    assert 0 < stats["hit_rate"] < 1
+
+
+def test_repeated_stops_are_zero_and_not_cached():
+    digipins, lats, lons = make_points(2)
+    cache = DistanceCache(size=100, path=None)
+    codes = [digipin_to_int(digipins[0])] * 2 + [digipin_to_int(digipins[1])]
+    meters, minutes = cache.matrix(codes, lambda from_nodes, to_nodes: (np.full(len(from_nodes), 7), np.ones(len(from_nodes))))
+    assert meters.tolist() == [[0, 0, 7], [0, 0, 7], [7, 7, 0]]
+    assert minutes.tolist() == [[0, 0, 1], [0, 0, 1], [1, 1, 0]]
+    assert cache.stats()["entries"] == 2
+
+
+def test_memory_tier_evicts_least_recently_used():
+    digipins, lats, lons = make_points(3)
+    a, b, c = [digipin_to_int(digipin) for digipin in digipins]
+    cache = DistanceCache(size=4, path=None)
+    compute = CountingHaversine(lats, lons)
+    cache.matrix([a, b], compute)
+    cache.matrix([b, c], compute)
+    # a-b was used least recently, so adding a-c evicts it
+    cache.matrix([b, c], compute)
+    cache.matrix([a, c], compute)
+    assert cache.stats()["entries"] == 4
+    compute.pairs = 0
+    cache.matrix([b, c], compute)
+    assert compute.pairs == 0
+    cache.matrix([a, b], compute)
+    assert compute.pairs == 2
+
+
+def test_disk_tier_is_shared_across_instances_per_provider(tmp_path):
+    digipins, lats, lons = make_points(20)
+    codes = [digipin_to_int(digipin) for digipin in digipins]
+    path = str(tmp_path / "distances.sqlite3")
+    expected = DistanceCache(size=1000, path=path).matrix(codes, CountingHaversine(lats, lons))
+
+    restarted = DistanceCache(size=1000, path=path)
+    compute = CountingHaversine(lats, lons)
+    meters, minutes = restarted.matrix(codes, compute)
+    assert (meters == expected[0]).all() and (minutes == expected[1]).all()
+    assert compute.pairs == 0
+    assert restarted.stats()["disk_hits"] == 20 * 19
+    restarted.matrix(codes, compute)
+    assert restarted.stats()["memory_hits"] == 20 * 19
+
+    # Another provider's distances are kept apart
+    DistanceCache(size=1000, path=path, provider="osrm").matrix(codes, compute)
+    assert compute.pairs == 20 * 19
+
+
+def test_haversine_provider_uses_cache_up_to_max_stops(monkeypatch):
+    cache = DistanceCache(size=100000, path=None)
+    monkeypatch.setitem(distance_cache._distance_caches, "haversine", cache)
+    digipins, lats, lons = make_points(30)
+    meters, minutes = HaversineProvider().travel_matrices(lats, lons, digipins)
+    assert (meters == build_distance_matrix(lats, lons)).all() and (minutes == meters // 500).all()
+    assert cache.stats()["misses"] == 30 * 29
+
+    monkeypatch.setattr(distance_providers, "ROUTE_DISTANCE_CACHE_MAX_STOPS", 10)
+    HaversineProvider().travel_matrices(lats, lons, digipins)
+    assert cache.stats()["misses"] == 30 * 29 and cache.stats()["memory_hits"] == 0
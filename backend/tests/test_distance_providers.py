@@ -0,0 +1,131 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services import distance_providers
+from services.distance_cache import DistanceCache
+from services.distance_providers import DistanceProviderError, OsrmTableProvider, get_distance_provider
+from services.route_optimizer import RouteOptimizationError, decode_route_points, solve_route
+from utils.digipin import get_digipin, haversine_matrix
+
+# The stub's roads are 40% longer than straight lines, driven at 10 m/s
+ROAD_FACTOR = 1.4
+ROAD_SPEED = 10
+
+
+class StubOsrm(BaseHTTPRequestHandler):
+    """Minimal OSRM table service: GET /table/v1/<profile>/<lon,lat;...>."""
+
+    requests = []
+    failures = 0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        StubOsrm.requests.append(url.path)
+        if StubOsrm.failures:
+            StubOsrm.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        points = np.array([[float(value) for value in point.split(",")] for point in url.path.split("/")[-1].split(";")])
+        query = parse_qs(url.query)
+        sources = [int(i) for i in query["sources"][0].split(";")]
+        destinations = [int(i) for i in query["destinations"][0].split(";")]
+        meters = ROAD_FACTOR * haversine_matrix(
+            points[sources, 1], points[sources, 0], points[destinations, 1], points[destinations, 0]
+        )
+        body = json.dumps({"code": "Ok", "distances": meters.tolist(), "durations": (meters / ROAD_SPEED).tolist()})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def osrm_url(monkeypatch):
+    monkeypatch.setattr(distance_providers, "RETRY_BACKOFF_SECONDS", 0)
+    StubOsrm.requests = []
+    StubOsrm.failures = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOsrm)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_points(n):
+    rng = np.random.default_rng(5)
+    digipins = [get_digipin(17.385 + dlat, 78.4867 + dlon) for dlat, dlon in rng.uniform(-0.1, 0.1, (n, 2))]
+    return (digipins, *decode_route_points(digipins))
+
+
+def test_table_is_fetched_in_tiles_and_cached(osrm_url):
+    digipins, lats, lons = make_points(10)
+    provider = OsrmTableProvider(osrm_url, tile_size=4, concurrency=3, cache=DistanceCache(size=1000, path=None, provider="osrm"))
+    meters, minutes = provider.travel_matrices(lats, lons, digipins)
+
+    assert len(StubOsrm.requests) == 9
+    expected = ROAD_FACTOR * haversine_matrix(lats, lons, lats, lons)
+    assert np.abs(meters - expected).max() <= 1
+    assert (np.abs(minutes - expected / ROAD_SPEED / 60) <= 0.5 + 1e-6).all()
+    assert (np.diag(meters) == 0).all()
+
+    # Everything is cached now; one new stop only needs the tiles it touches
+    provider.travel_matrices(lats, lons, digipins)
+    assert len(StubOsrm.requests) == 9
+    digipins, lats, lons = make_points(11)
+    provider.travel_matrices(lats, lons, digipins)
+    assert len(StubOsrm.requests) == 9 + 5
+    provider.close()
+
+
+def test_failed_table_requests_are_retried(osrm_url):
+    digipins, lats, lons = make_points(3)
+    StubOsrm.failures = 2
+    provider = OsrmTableProvider(osrm_url, retries=2, cache=DistanceCache(size=1000, path=None, provider="osrm"))
+    meters, _ = provider.travel_matrices(lats, lons, digipins)
+    assert len(StubOsrm.requests) == 3 and meters[0, 1] > 0
+
+    StubOsrm.failures = 2
+    provider = OsrmTableProvider(osrm_url, retries=1, cache=DistanceCache(size=1000, path=None, provider="osrm"))
+    with pytest.raises(DistanceProviderError, match="after 2 attempts"):
+        provider.travel_matrices(lats, lons, digipins)
+
+
+def test_solve_route_with_road_distances(osrm_url, monkeypatch):
+    provider = OsrmTableProvider(osrm_url, cache=DistanceCache(size=1000, path=None, provider="osrm"))
+    monkeypatch.setitem(distance_providers._distance_providers, "osrm", provider)
+    digipins, _, _ = make_points(8)
+    req = OptimizeRouteRequest(
+        depot=digipins[0], vehicles=2, distance_provider="osrm", solver={"time_limit_seconds": 1},
+        locations=[{"digipin": digipin, "priority": 2, "time_window": [0, 480]} for digipin in digipins[1:]]
+    )
+    response = solve_route(req)
+    assert sorted(stop for route in response.routes for stop in route.stops[1:-1]) == sorted(digipins[1:])
+    assert StubOsrm.requests
+
+
+def test_osrm_provider_requires_configuration_and_dense_arcs(monkeypatch):
+    monkeypatch.setattr(distance_providers, "_distance_providers", {})
+    monkeypatch.setattr(distance_providers, "ROUTE_OSRM_URL", None)
+    with pytest.raises(DistanceProviderError, match="ROUTE_OSRM_URL"):
+        get_distance_provider("osrm")
+    digipins, _, _ = make_points(3)
+    request = {
+        "depot": digipins[0], "vehicles": 1, "distance_provider": "osrm",
+        "locations": [{"digipin": digipins[1], "priority": 1, "time_window": [0, 480]}]
+    }
+    with pytest.raises(RouteOptimizationError, match="not configured"):
+        solve_route(OptimizeRouteRequest(**request))
+    with pytest.raises(ValidationError, match="dense arc model"):
+        OptimizeRouteRequest(**request, arc_model="sparse")
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from dependencies import get_current_admin_user
+from main import app
+from routes import digipin as digipin_routes
+from services import http_client, route_jobs
+from services.http_client import close_http_client, get_http_client
+from services.route_jobs import RouteJobStore
+
+
+class StubNominatim(BaseHTTPRequestHandler):
+    """Keep-alive reverse geocoder that records the client port of every request."""
+
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+    delay = 0
+
+    def do_GET(self):
+        StubNominatim.client_ports.append(self.client_address[1])
+        time.sleep(StubNominatim.delay)
+        body = json.dumps({
+            "display_name": "Someplace, Hyderabad",
+            "address": {"postcode": "500081", "city": "Hyderabad", "state": "Telangana", "country": "India"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest_asyncio.fixture
+async def nominatim(monkeypatch):
+    StubNominatim.client_ports = []
+    StubNominatim.delay = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubNominatim)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(digipin_routes, "NOMINATIM_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    await close_http_client()
+    yield
+    await close_http_client()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_address_lookups_reuse_one_pooled_connection(nominatim):
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+    try:
+        async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            for _ in range(3):
+                response = await ac.get("/api/address", params={"digipin": "425-FF5-J535"})
+                assert response.status_code == 200
+                assert response.json()["city"] == "Hyderabad"
+            stats = (await ac.get("/admin/http-client")).json()
+    finally:
+        app.dependency_overrides.pop(get_current_admin_user)
+
+    assert len(StubNominatim.client_ports) == 3 and len(set(StubNominatim.client_ports)) == 1
+    assert stats["requests"] == 3 and stats["errors"] == 0
+    assert stats["connections"] == stats["idle_connections"] == 1
+    assert stats["in_flight"] == 0 and stats["peak_in_flight"] == 1
+    assert stats["max_connections"] == 20 and stats["http2"] is False
+
+
+@pytest.mark.asyncio
+async def test_address_lookup_times_out(nominatim, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_CLIENT_TIMEOUT", httpx.Timeout(0.2))
+    StubNominatim.delay = 1
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/address", params={"digipin": "425-FF5-J535"})
+    assert response.status_code == 504
+    assert http_client.http_client_stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lifespan_opens_and_closes_the_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(route_jobs, "_route_job_store", RouteJobStore(str(tmp_path / "jobs.sqlite3")))
+    await close_http_client()
+    async with app.router.lifespan_context(app):
+        client = get_http_client()
+        assert not client.is_closed
+        assert get_http_client() is client
+    assert client.is_closed
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from schemas.digipin_schemas import OptimizeRouteRequest, OptimizeRouteResponse, OptimizedRoute
+from services import route_cache
+from services.route_cache import RouteResultCache, route_request_key
+from services.route_optimizer import RouteOptimizationError
+
+ROUTE_REQUEST = {
+    "depot": "5J2-CP3-J7L6",
+    "vehicles": 1,
+    "locations": [
+        {"digipin": "5J2-CPJ-JCJF", "priority": 1, "time_window": [0, 9999]},
+        {"digipin": "5CJ-7K3-FKFK", "priority": 2, "time_window": [0, 9999]}
+    ],
+    "solver": {"time_limit_seconds": 1}
+}
+
+RESPONSE = OptimizeRouteResponse(routes=[OptimizedRoute(vehicle_id=0, stops=["5J2-CP3-J7L6", "5J2-CPJ-JCJF", "5J2-CP3-J7L6"])])
+
+
+def test_request_key_ignores_stop_order_but_not_options():
+    req = OptimizeRouteRequest(**ROUTE_REQUEST)
+    reordered = OptimizeRouteRequest(**{**ROUTE_REQUEST, "locations": ROUTE_REQUEST["locations"][::-1]})
+    assert route_request_key(req) == route_request_key(reordered)
+    for change in ({"vehicles": 2}, {"solver": {"time_limit_seconds": 2}}, {"arc_model": "sparse"}):
+        assert route_request_key(OptimizeRouteRequest(**{**ROUTE_REQUEST, **change})) != route_request_key(req)
+    changed_window = [{**ROUTE_REQUEST["locations"][0], "time_window": [0, 100]}, ROUTE_REQUEST["locations"][1]]
+    assert route_request_key(OptimizeRouteRequest(**{**ROUTE_REQUEST, "locations": changed_window})) != route_request_key(req)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_solve():
+    cache = RouteResultCache(size=4, ttl=60, path=None)
+    req = OptimizeRouteRequest(**ROUTE_REQUEST)
+    calls = []
+
+    async def solve():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return RESPONSE
+
+    results = await asyncio.gather(*[cache.get_or_solve(req, solve) for _ in range(5)])
+    assert len(calls) == 1
+    assert [result.cache_hit for result in results] == [False, True, True, True, True]
+    assert (await cache.get_or_solve(req, solve)).cache_hit
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_solves_are_not_cached():
+    cache = RouteResultCache(size=4, ttl=60, path=None)
+    req = OptimizeRouteRequest(**ROUTE_REQUEST)
+
+    async def fail():
+        raise RouteOptimizationError("No solution found")
+
+    with pytest.raises(RouteOptimizationError):
+        await cache.get_or_solve(req, fail)
+    assert await cache.get(route_request_key(req)) is None
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_survives_restart_and_expires(tmp_path, monkeypatch):
+    path = str(tmp_path / "routes.sqlite3")
+    await RouteResultCache(size=4, ttl=60, path=path).put("key", RESPONSE)
+    assert await RouteResultCache(size=4, ttl=60, path=path).get("key") == RESPONSE
+
+    clock = [1000.0]
+    monkeypatch.setattr(route_cache.time, "time", lambda: clock[0])
+    expiring = RouteResultCache(size=4, ttl=60, path=path)
+    await expiring.put("old", RESPONSE)
+    clock[0] += 61
+    assert await RouteResultCache(size=4, ttl=60, path=path).get("old") is None
+
+
+@pytest.mark.asyncio
+async def test_optimize_route_reports_cache_hits(monkeypatch):
+    monkeypatch.setattr(route_cache, "_route_cache", RouteResultCache(size=4, ttl=60, path=None))
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post("/api/optimize-route", json=ROUTE_REQUEST)
+        second = await ac.post("/api/optimize-route", json={**ROUTE_REQUEST, "locations": ROUTE_REQUEST["locations"][::-1]})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["cache_hit"] is False
+    assert second.json() == {**first.json(), "cache_hit": True}
@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+import pytest
+
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services import route_decomposition
+from services.route_decomposition import (
+    improve_routes, merge_routes, partition_request, solve_decomposed, split_vehicles
+)
+from services.route_optimizer import solve_route
+from utils.digipin import digipin_to_int, get_digipin
+
+
+def make_request(n, vehicles, **options):
+    rng = np.random.default_rng(0)
+    locations = [
+        {"digipin": get_digipin(17.385 + dlat, 78.4867 + dlon), "priority": 2, "time_window": [0, 480]}
+        for dlat, dlon in rng.uniform(-0.1, 0.1, (n, 2))
+    ]
+    return OptimizeRouteRequest(
+        depot=get_digipin(17.385, 78.4867), vehicles=vehicles, locations=locations, **options
+    )
+
+
+def stop_after(seconds):
+    deadline = time.monotonic() + seconds
+    return lambda: time.monotonic() > deadline
+
+
+def visited_stops(response):
+    return sorted(stop for route in response.routes for stop in route.stops[1:-1])
+
+
+def test_split_vehicles_is_proportional():
+    vehicles = split_vehicles(np.array([100, 300, 50]), 10)
+    assert vehicles.sum() == 10
+    assert (vehicles >= 1).all()
+    assert vehicles.argmax() == 1
+    assert split_vehicles(np.array([5, 5, 5]), 3).tolist() == [1, 1, 1]
+
+
+@pytest.mark.parametrize("method", ["kmeans", "prefix"])
+def test_partition_covers_every_stop_once(method):
+    req = make_request(600, 12, decomposition=method, cluster_size=150)
+    parts = partition_request(req)
+    assert len(parts) == 4
+    assert sum(part.vehicles for part in parts) == 12
+    assert sorted(loc.digipin for part in parts for loc in part.locations) == sorted(loc.digipin for loc in req.locations)
+    assert all(part.decomposition is None and part.depot == req.depot for part in parts)
+    if method == "prefix":
+        # Sorted-code runs: clusters do not interleave in DIGIPIN order
+        ranges = sorted(
+            (min(codes), max(codes))
+            for codes in ([digipin_to_int(loc.digipin) for loc in part.locations] for part in parts)
+        )
+        assert all(high < next_low for (_, high), (next_low, _) in zip(ranges, ranges[1:]))
+        assert len({len(part.locations) for part in parts}) == 1
+
+
+def test_partition_never_uses_more_clusters_than_vehicles():
+    parts = partition_request(make_request(600, 2, decomposition="kmeans", cluster_size=100))
+    assert len(parts) == 2
+
+
+def test_merge_renumbers_vehicles_across_clusters():
+    req = make_request(90, 4, decomposition="kmeans", cluster_size=30)
+    parts = partition_request(req)
+    responses = [solve_route(part, should_stop=stop_after(0.5)) for part in parts]
+    merged = merge_routes(parts, responses)
+    ids = [route.vehicle_id for route in merged.routes]
+    assert len(ids) == len(set(ids)) and max(ids) < req.vehicles
+    assert visited_stops(merged) == sorted(loc.digipin for loc in req.locations)
+
+
+def test_improvement_pass_starts_from_stitched_routes():
+    req = make_request(120, 4, decomposition="kmeans", cluster_size=40, improvement_seconds=1)
+    parts = partition_request(req)
+    merged = merge_routes(parts, [solve_route(part, should_stop=stop_after(0.5)) for part in parts])
+    objectives = []
+    improved = improve_routes(req, merged, on_solution=lambda response, objective: objectives.append(objective))
+    assert visited_stops(improved) == visited_stops(merged)
+    # The first solution is the stitched one, not a fresh construction
+    assert objectives and objectives[-1] <= objectives[0]
+    assert objectives[0] < 1000000
+
+
+def test_solve_decomposed_reports_progress(monkeypatch):
+    # Cut each cluster's search short, independently of job cancellation
+    def quick_solve(part, on_solution=None, should_stop=None):
+        return solve_route(part, on_solution=on_solution, should_stop=stop_after(0.5))
+
+    monkeypatch.setattr(route_decomposition, "solve_route", quick_solve)
+    req = make_request(90, 3, decomposition="prefix", cluster_size=30)
+    progress = []
+    response = solve_decomposed(req, on_solution=lambda response, objective: progress.append(response))
+    assert visited_stops(response) == sorted(loc.digipin for loc in req.locations)
+    # Progress covers the clusters solved so far and ends with every stop
+    assert len(visited_stops(progress[0])) < 90
+    assert visited_stops(progress[-1]) == visited_stops(response)
+
+
+def test_solve_decomposed_stops_when_cancelled():
+    req = make_request(90, 3, decomposition="kmeans", cluster_size=30)
+    response = solve_decomposed(req, should_stop=lambda: True)
+    assert response.routes == []
@@ -0,0 +1,69 @@
+import httpx
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from schemas.digipin_schemas import MultiDepotRouteRequest
+from services.route_depots import split_depots
+from services.solver_pool import get_solver_pool
+from utils.digipin import get_digipin
+
+HYDERABAD = (17.385, 78.4867)
+BENGALURU = (12.9716, 77.5946)
+
+
+def stops_around(center, n, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {"digipin": get_digipin(center[0] + dlat, center[1] + dlon), "priority": 2, "time_window": [0, 480]}
+        for dlat, dlon in rng.uniform(-0.05, 0.05, (n, 2))
+    ]
+
+
+def make_request(**options):
+    return {
+        "depots": [
+            {"depot": get_digipin(*HYDERABAD), "vehicles": 2, "locations": stops_around(HYDERABAD, 12, 1)},
+            {"depot": get_digipin(*BENGALURU), "vehicles": 2, "locations": stops_around(BENGALURU, 12, 2)},
+            {"depot": get_digipin(28.6139, 77.209), "vehicles": 1},
+        ],
+        "locations": stops_around(HYDERABAD, 3, 3) + stops_around(BENGALURU, 3, 4),
+        "solver": {"time_limit_seconds": 1},
+        **options
+    }
+
+
+def test_shared_stops_go_to_the_nearest_depot():
+    request = make_request(arc_model="sparse", neighbors=5)
+    parts = split_depots(MultiDepotRouteRequest(**request))
+    assert [part.depot for part in parts] == [fleet["depot"] for fleet in request["depots"]]
+    assert [len(part.locations) for part in parts] == [15, 15, 0]
+    assert parts[0].locations[12:] == MultiDepotRouteRequest(**request).locations[:3]
+    assert all(part.arc_model == "sparse" and part.neighbors == 5 and part.solver.time_limit_seconds == 1 for part in parts)
+
+
+@pytest.mark.asyncio
+async def test_multi_depot_routes_are_solved_in_parallel_and_merged():
+    request = make_request()
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/optimize-route/multi-depot", json=request)
+        too_long = await ac.post("/api/optimize-route/multi-depot", json={**request, "solver": {"time_limit_seconds": 600}})
+    assert response.status_code == 200
+    assert too_long.status_code == 422
+    body = response.json()
+
+    expected = sorted(loc["digipin"] for fleet in request["depots"] for loc in fleet.get("locations", []))
+    expected += [loc["digipin"] for loc in request["locations"]]
+    assert sorted(stop for route in body["routes"] for stop in route["stops"][1:-1]) == sorted(expected)
+
+    stats = body["depots"]
+    assert [depot["stops"] for depot in stats] == [15, 15, 0]
+    assert stats[2]["vehicle_ids"] == [] and stats[2]["solve_seconds"] == 0
+    routes = {route["vehicle_id"]: route for route in body["routes"]}
+    for depot, vehicle_range in zip(stats[:2], (range(0, 2), range(2, 4))):
+        assert depot["vehicle_ids"] and set(depot["vehicle_ids"]) <= set(vehicle_range)
+        assert all(routes[vehicle]["stops"][0] == depot["depot"] for vehicle in depot["vehicle_ids"])
+        assert depot["solve_seconds"] > 0
+    if get_solver_pool().size >= 2:
+        assert body["elapsed_seconds"] < stats[0]["solve_seconds"] + stats[1]["solve_seconds"]
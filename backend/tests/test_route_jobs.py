@@ -0,0 +1,134 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from routes import digipin as digipin_routes
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services import route_jobs
+from services.route_jobs import RouteJobStore, run_route_job
+
+ROUTE_REQUEST = {
+    "depot": "5J2-CP3-J7L6",
+    "vehicles": 1,
+    "locations": [
+        {"digipin": "5J2-CPJ-JCJF", "priority": 1, "time_window": [0, 9999]},
+        {"digipin": "5CJ-7K3-FKFK", "priority": 2, "time_window": [0, 9999]}
+    ]
+}
+
+
+@pytest.fixture
+def job_store(tmp_path, monkeypatch):
+    store = RouteJobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(route_jobs, "_route_job_store", store)
+    return store
+
+
+async def wait_for_job(ac, job_id, predicate, timeout=20):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = (await ac.get(f"/api/optimize-route/jobs/{job_id}")).json()
+        if predicate(job):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, job
+        await asyncio.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_route_job_reports_progress_and_cancels(job_store):
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/optimize-route/jobs", json=ROUTE_REQUEST)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        job = await wait_for_job(ac, job_id, lambda job: job["result"] is not None)
+        assert job["status"] == "running"
+        assert job["objective"] is not None
+        assert job["result"]["routes"][0]["stops"][0] == ROUTE_REQUEST["depot"]
+
+        response = await ac.delete(f"/api/optimize-route/jobs/{job_id}")
+        assert response.status_code == 200
+        job = await wait_for_job(ac, job_id, lambda job: job["status"] != "running")
+        assert job["status"] == "cancelled"
+        assert job["result"]["routes"]
+
+        response = await ac.delete(f"/api/optimize-route/jobs/{job_id}")
+        assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_unknown_route_job_is_404(job_store):
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.get("/api/optimize-route/jobs/missing")).status_code == 404
+        assert (await ac.delete("/api/optimize-route/jobs/missing")).status_code == 404
+
+
+def test_queued_job_cancels_without_solving(job_store):
+    req = OptimizeRouteRequest(**ROUTE_REQUEST)
+    job_id = job_store.create(req)
+    assert job_store.request_cancel(job_id)
+    assert run_route_job(job_store, job_id, req) == "cancelled"
+    assert job_store.get(job_id)["result"] is None
+
+
+def test_failed_job_records_error(job_store):
+    req = OptimizeRouteRequest(**{**ROUTE_REQUEST, "depot": "AAAAAAAAAA"})
+    job_id = job_store.create(req)
+    assert run_route_job(job_store, job_id, req) == "failed"
+    assert job_store.get(job_id)["error"]
+
+
+def test_orphaned_jobs_are_claimed_once(job_store):
+    req = OptimizeRouteRequest(**ROUTE_REQUEST)
+    job_id = job_store.create(req)
+    job_store.mark_running(job_id)
+    job_store.save_progress(job_id, {"routes": []}, 42)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    job_store._update(job_id, owner_pid=dead.pid)
+
+    claimed = job_store.claim_orphaned()
+    assert [claimed_id for claimed_id, _ in claimed] == [job_id]
+    assert claimed[0][1] == req
+    job = job_store.get(job_id)
+    assert job["status"] == "queued"
+    assert job["objective"] == 42
+    # Now owned by this live process, so nobody else takes it
+    assert job_store.claim_orphaned() == []
+
+
+@pytest.mark.asyncio
+async def test_route_job_event_stream(job_store, monkeypatch):
+    monkeypatch.setattr(digipin_routes, "ROUTE_JOB_EVENT_POLL_SECONDS", 0.1)
+    request = {**ROUTE_REQUEST, "solver": {"time_limit_seconds": 1}}
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        job_id = (await ac.post("/api/optimize-route/jobs", json=request)).json()["job_id"]
+        async with ac.stream("GET", f"/api/optimize-route/jobs/{job_id}/events") as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join([chunk async for chunk in response.aiter_text()])
+        assert (await ac.get("/api/optimize-route/jobs/missing/events")).status_code == 404
+
+    events = [block.split("\n", 1) for block in body.strip().split("\n\n")]
+    names = [name for name, _ in events]
+    assert names[-1] == "event: done" and "event: solution" in names
+    final = json.loads(events[-1][1][len("data: "):])
+    assert final["status"] == "completed"
+    assert final["result"]["routes"]
+
+
+@pytest.mark.asyncio
+async def test_optimize_route_enforces_time_limit_cap():
+    request = {**ROUTE_REQUEST, "solver": {"time_limit_seconds": 10000}}
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        too_long = await ac.post("/api/optimize-route", json=request)
+        short = await ac.post("/api/optimize-route", json={**ROUTE_REQUEST, "solver": {"time_limit_seconds": 1}})
+        job_cap = await ac.post("/api/optimize-route", json={**ROUTE_REQUEST, "solver": {"time_limit_seconds": 600}})
+    assert too_long.status_code == 422
+    assert job_cap.status_code == 422 and "jobs" in job_cap.json()["detail"]
+    assert short.status_code == 200
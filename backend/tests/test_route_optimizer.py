@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+import pytest
+
+from schemas.digipin_schemas import OptimizeRouteRequest
+from services.route_optimizer import (
+    UNSERVED_REASON, RouteOptimizationError, build_distance_matrix, build_time_matrix, decode_route_points,
+    find_unservable_stops, solve_route
+)
+from utils.digipin import get_digipin, haversine, haversine_matrix
+from utils.digipin_knn import nearest_neighbors
+
+
+def random_points(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(8.0, 36.0, n), rng.uniform(64.0, 98.0, n)
+
+
+def test_distance_matrix_matches_scalar_haversine():
+    lats, lons = random_points(300)
+    matrix = build_distance_matrix(lats, lons)
+    assert matrix.dtype == np.int32 and matrix.shape == (300, 300)
+    expected = np.array([[int(haversine(a, b, c, d)) for c, d in zip(lats, lons)] for a, b in zip(lats, lons)])
+    # Vectorized trig may differ from math.* in the last ulp, which can only
+    # move a distance that sits right on a whole meter
+    assert np.abs(matrix - expected).max() <= 1
+    assert np.count_nonzero(matrix != expected) <= 3
+    assert (np.diag(matrix) == 0).all()
+
+
+def test_time_matrix_matches_callback_formula():
+    distances = build_distance_matrix(*random_points(50))
+    times = build_time_matrix(distances)
+    assert times.tolist() == [[int(d / 500) + 5 for d in row] for row in distances.tolist()]
+
+
+def test_decode_route_points_reports_bad_digipin():
+    lats, lons = decode_route_points(["5J2-CP3-J7L6", "5J2CPJJCJF"])
+    assert lats.shape == lons.shape == (2,)
+    with pytest.raises(RouteOptimizationError, match="Invalid character"):
+        decode_route_points(["5J2-CP3-J7L6", "5J2-CP3-J7LA"])
+    with pytest.raises(RouteOptimizationError, match="length"):
+        decode_route_points(["5J2-CP3"])
+
+
+def test_nearest_neighbors_matches_brute_force():
+    rng = np.random.default_rng(3)
+    centers = rng.uniform([10, 70], [30, 90], (5, 2))
+    points = centers[rng.integers(0, 5, 1500)] + rng.normal(0, 0.05, (1500, 2))
+    points[:20] = points[20]  # duplicates tie at distance 0
+    lats, lons = points[:, 0], points[:, 1]
+
+    indices, distances = nearest_neighbors(lats, lons, 8)
+    full = haversine_matrix(lats, lons, lats, lons)
+    np.fill_diagonal(full, np.inf)
+    assert (distances == np.sort(full, axis=1)[:, :8].astype(np.int32)).all()
+    assert (indices != np.arange(1500)[:, None]).all()
+    assert nearest_neighbors(lats[:3], lons[:3], 8)[0].shape == (3, 2)
+
+
+def test_sparse_arc_model_visits_every_stop():
+    rng = np.random.default_rng(0)
+    locations = [
+        {"digipin": get_digipin(17.385 + dlat, 78.4867 + dlon), "priority": 2, "time_window": [0, 480]}
+        for dlat, dlon in rng.uniform(-0.05, 0.05, (120, 2))
+    ]
+    req = OptimizeRouteRequest(
+        depot=get_digipin(17.385, 78.4867), vehicles=3, locations=locations, arc_model="sparse", neighbors=10
+    )
+    deadline = time.monotonic() + 2
+    response = solve_route(req, should_stop=lambda: time.monotonic() > deadline)
+    visited = [stop for route in response.routes for stop in route.stops[1:-1]]
+    assert sorted(visited) == sorted(location["digipin"] for location in locations)
+
+
+def small_request(**solver):
+    rng = np.random.default_rng(5)
+    locations = [
+        {"digipin": get_digipin(17.385 + dlat, 78.4867 + dlon), "priority": 2, "time_window": [0, 480]}
+        for dlat, dlon in rng.uniform(-0.05, 0.05, (30, 2))
+    ]
+    return OptimizeRouteRequest(
+        depot=get_digipin(17.385, 78.4867), vehicles=2, locations=locations, solver=solver
+    )
+
+
+def test_solver_budget_options_end_search_early():
+    start = time.monotonic()
+    solutions = []
+    solve_route(small_request(solution_limit=1), on_solution=lambda response, objective: solutions.append(objective))
+    assert len(solutions) == 1
+    assert time.monotonic() - start < 5
+
+    start = time.monotonic()
+    response = solve_route(small_request(plateau_seconds=0.5))
+    assert time.monotonic() - start < 10
+    assert sum(len(route.stops) - 2 for route in response.routes) == 30
+
+
+@pytest.mark.parametrize("strategy,metaheuristic", [
+    ("savings", "tabu_search"), ("local_cheapest_insertion", "greedy_descent"), ("automatic", "automatic")
+])
+def test_solver_strategies(strategy, metaheuristic):
+    req = small_request(
+        time_limit_seconds=1, first_solution_strategy=strategy, local_search_metaheuristic=metaheuristic
+    )
+    response = solve_route(req)
+    assert sum(len(route.stops) - 2 for route in response.routes) == 30
+
+
+def test_find_unservable_stops():
+    windows = np.array([[0, 480], [300, 200], [500, 600], [0, 40], [450, 480], [100, 480]])
+    from_depot = np.array([30, 30, 30, 60, 20, 20])
+    to_depot = np.array([30, 30, 30, 60, 40, 20])
+    unservable = dict(find_unservable_stops(windows, from_depot, to_depot))
+    assert sorted(unservable) == [1, 2, 3, 4]
+    assert unservable[1] == "time window is empty"
+    assert "after the 480-minute shift" in unservable[2]
+    assert "closes at minute 40" in unservable[3] and "60 minutes from the depot" in unservable[3]
+    assert "back at the depot" in unservable[4]
+
+
+@pytest.mark.parametrize("arc_model", ["dense", "sparse"])
+def test_unservable_stops_are_dropped_before_solving(arc_model):
+    req = small_request(time_limit_seconds=1)
+    impossible = [
+        {"digipin": req.locations[0].digipin, "priority": 1, "time_window": [200, 100]},
+        {"digipin": get_digipin(28.6139, 77.209), "priority": 1, "time_window": [0, 480]},
+        {"digipin": req.locations[1].digipin, "priority": 1, "time_window": [478, 480]},
+    ]
+    req = OptimizeRouteRequest(**{
+        **req.model_dump(), "arc_model": arc_model,
+        "locations": impossible[:2] + req.model_dump()["locations"] + impossible[2:]
+    })
+    response = solve_route(req)
+
+    assert [stop.digipin for stop in response.dropped] == [loc["digipin"] for loc in impossible]
+    assert response.dropped[0].reason == "time window is empty"
+    assert "minutes from the depot" in response.dropped[1].reason
+    assert "back at the depot" in response.dropped[2].reason
+    visited = [stop for route in response.routes for stop in route.stops[1:-1]]
+    assert len(visited) == 30 and get_digipin(28.6139, 77.209) not in visited
+
+
+def test_warm_start_skips_dropped_stops_and_reports_unserved():
+    req = small_request(time_limit_seconds=1)
+    late = {"digipin": req.locations[0].digipin, "priority": 1, "time_window": [479, 480]}
+    req = OptimizeRouteRequest(**{**req.model_dump(), "vehicles": 1, "locations": [late] + req.model_dump()["locations"]})
+    # Node 1 is the unservable stop; the warm start must not trip over it
+    response = solve_route(req, initial_routes=[list(range(1, 32))])
+    assert [stop.reason for stop in response.dropped][0].startswith("a vehicle serving it")
+    assert len([stop for route in response.routes for stop in route.stops[1:-1]]) == 30
+
+    # A single vehicle cannot fit every stop into its shift: the rest are unserved
+    crowded = small_request(time_limit_seconds=1)
+    crowded = OptimizeRouteRequest(**{
+        **crowded.model_dump(), "vehicles": 1,
+        "locations": [{**loc, "time_window": [0, 60]} for loc in crowded.model_dump()["locations"]]
+    })
+    response = solve_route(crowded)
+    served = [stop for route in response.routes for stop in route.stops[1:-1]]
+    assert response.dropped and all(stop.reason == UNSERVED_REASON for stop in response.dropped)
+    assert len(served) + len(response.dropped) == 30
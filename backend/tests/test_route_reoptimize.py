@@ -0,0 +1,92 @@
+import time
+
+import httpx
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from schemas.digipin_schemas import OptimizeRouteRequest, RouteLocation
+from services import route_jobs
+from services.route_jobs import RouteJobStore, JOB_COMPLETED
+from services.route_optimizer import RouteOptimizationError, apply_route_diff, solve_route
+from utils.digipin import get_digipin
+
+
+def make_request(n, vehicles):
+    rng = np.random.default_rng(1)
+    locations = [
+        {"digipin": get_digipin(17.385 + dlat, 78.4867 + dlon), "priority": 2, "time_window": [0, 480]}
+        for dlat, dlon in rng.uniform(-0.05, 0.05, (n, 2))
+    ]
+    return OptimizeRouteRequest(depot=get_digipin(17.385, 78.4867), vehicles=vehicles, locations=locations)
+
+
+def visited_stops(routes):
+    return sorted(stop for route in routes for stop in route["stops"][1:-1])
+
+
+@pytest.fixture(scope="module")
+def solved():
+    req = make_request(40, 2)
+    deadline = time.monotonic() + 1
+    return req, solve_route(req, should_stop=lambda: time.monotonic() > deadline)
+
+
+def test_apply_route_diff_keeps_previous_assignment(solved):
+    req, response = solved
+    removed = req.locations[3].digipin
+    added = RouteLocation(digipin=get_digipin(17.4, 78.5), priority=1, time_window=(0, 480))
+    edited, initial_routes = apply_route_diff(req, response.routes, [added], [removed])
+
+    assert len(edited.locations) == len(req.locations)
+    assert removed not in [loc.digipin for loc in edited.locations]
+    assigned = sorted(node for route in initial_routes for node in route)
+    # Every kept stop is still assigned; the added stop (last node) is not
+    assert assigned == list(range(1, len(edited.locations)))
+
+    with pytest.raises(RouteOptimizationError, match="not in the request"):
+        apply_route_diff(req, response.routes, [], ["FFF-FFF-FFFF"])
+
+
+@pytest.mark.asyncio
+async def test_reoptimize_from_previous_routes(solved):
+    req, response = solved
+    removed = [req.locations[0].digipin, req.locations[5].digipin]
+    added = [{"digipin": get_digipin(17.37, 78.47), "priority": 1, "time_window": [0, 480]}]
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        result = await ac.post("/api/optimize-route/reoptimize", json={
+            "request": req.model_dump(mode="json"),
+            "routes": response.model_dump(mode="json")["routes"],
+            "add": added,
+            "remove": removed,
+            "time_limit_seconds": 1,
+        })
+    assert result.status_code == 200
+    expected = sorted([loc.digipin for loc in req.locations if loc.digipin not in removed] + [added[0]["digipin"]])
+    assert visited_stops(result.json()["routes"]) == expected
+
+
+@pytest.mark.asyncio
+async def test_reoptimize_from_job(solved, tmp_path, monkeypatch):
+    req, response = solved
+    store = RouteJobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(route_jobs, "_route_job_store", store)
+    job_id = store.create(req)
+    store.finish(job_id, JOB_COMPLETED, result=response.model_dump())
+    pending_id = store.create(req)
+
+    async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+        result = await ac.post("/api/optimize-route/reoptimize", json={
+            "job_id": job_id, "remove": [req.locations[1].digipin], "time_limit_seconds": 1
+        })
+        missing = await ac.post("/api/optimize-route/reoptimize", json={"job_id": "missing"})
+        pending = await ac.post("/api/optimize-route/reoptimize", json={"job_id": pending_id})
+        incomplete = await ac.post("/api/optimize-route/reoptimize", json={"remove": []})
+
+    assert result.status_code == 200
+    assert req.locations[1].digipin not in visited_stops(result.json()["routes"])
+    assert len(visited_stops(result.json()["routes"])) == len(req.locations) - 1
+    assert missing.status_code == 404
+    assert pending.status_code == 409
+    assert incomplete.status_code == 422
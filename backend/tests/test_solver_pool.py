@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from services.solver_pool import SolverPool, SolverPoolFullError
+
+
+@pytest.mark.asyncio
+async def test_solver_pool_rejects_work_beyond_queue_depth():
+    pool = SolverPool(size=1, queue_depth=0)
+    try:
+        running = asyncio.create_task(pool.run(time.sleep, 1))
+        await asyncio.sleep(0)
+        with pytest.raises(SolverPoolFullError):
+            await pool.run(time.sleep, 0)
+        await running
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_solve():
+    pool = SolverPool(size=1, queue_depth=0)
+    try:
+        # Warm up the worker process so the timing below is not process start-up
+        await pool.run(time.sleep, 0)
+        solve = asyncio.create_task(pool.run(time.sleep, 2))
+        async with AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            start = time.perf_counter()
+            response = await ac.get("/api/digipin", params={"lat": 17.385, "lng": 78.4867})
+            elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        assert elapsed < 0.5
+        assert not solve.done()
+        await solve
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_solver_pool_map_is_one_queue_entry():
+    pool = SolverPool(size=2, queue_depth=0)
+    try:
+        batch = asyncio.create_task(pool.map(pow, [(2, 3), (3, 2), (2, 10)]))
+        await asyncio.sleep(0)
+        assert pool.pending == 1
+        assert await batch == [8, 9, 1024]
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
@@ -1,6 +1,7 @@
 #backend/utils/digipin.py
 import re
 import math
+import numpy as np
 import qrcode
 from qrcode.image.svg import SvgImage
 from xml.etree import ElementTree as ET
@@ -10,6 +11,9 @@ from utils.Log import Logger
 from fastapi import HTTPException
 Logging = Logger(name="utils.digipin", log_file="backend/Logs/app.log", level=logging.DEBUG)
 DIGIPIN_ALLOWED_PATTERN = re.compile(r"^[FCJKLMPT2-9]+$")
+# Longest DIGIPIN input accepted by the batch decoder, hyphens included
+# (matches the max_length of the /api/latlng query parameter)
+DIGIPIN_MAX_INPUT_LENGTH = 14
 
 # 4x4 grid used for digipin encoding
 DIGIPIN_GRID = [
@@ -27,45 +31,188 @@ BOUNDS = {
     "maxLon": 99.5
 }
 
+MIN_LAT, MAX_LAT = BOUNDS["minLat"], BOUNDS["maxLat"]
+MIN_LON, MAX_LON = BOUNDS["minLon"], BOUNDS["maxLon"]
+
+# Symbol -> (row, col) in DIGIPIN_GRID, built once instead of scanning the grid
+DIGIPIN_SYMBOL_POSITIONS = {
+    symbol: (row, col)
+    for row, symbols in enumerate(DIGIPIN_GRID)
+    for col, symbol in enumerate(symbols)
+}
+
+# (lat, lon) cell size at each of the 10 levels. Every cell edge is a binary
+# multiple of the level-10 size, so these equal the per-level divisions the
+# codec used to recompute from the running bounds.
+DIGIPIN_LEVEL_CELL_SIZES = tuple(
+    ((MAX_LAT - MIN_LAT) / 4 ** level, (MAX_LON - MIN_LON) / 4 ** level)
+    for level in range(1, 11)
+)
+
+# Packed integer form: each symbol is its grid cell (row * 4 + col) in one
+# 4-bit nibble, first symbol in the most significant nibble, so a full code
+# is a 40-bit integer and codes sharing a prefix form one contiguous range.
+DIGIPIN_LEVELS = 10
+DIGIPIN_GRID_SIZE = 4 ** DIGIPIN_LEVELS
+_SYMBOLS = "".join("".join(row) for row in DIGIPIN_GRID)
+_SYMBOL_TO_CELL = {symbol: cell for cell, symbol in enumerate(_SYMBOLS)}
+# Level-10 cell size; every cell edge is an exact binary multiple of it
+_LAT_CELL = (BOUNDS["maxLat"] - BOUNDS["minLat"]) / DIGIPIN_GRID_SIZE
+_LON_CELL = (BOUNDS["maxLon"] - BOUNDS["minLon"]) / DIGIPIN_GRID_SIZE
+
+# All 256 two-level symbol pairs, indexed by (two row digits) << 4 | (two
+# column digits), so encoding needs five lookups instead of ten
+DIGIPIN_PAIR_SYMBOLS = [
+    DIGIPIN_GRID[rows >> 2][cols >> 2] + DIGIPIN_GRID[rows & 3][cols & 3]
+    for rows in range(16)
+    for cols in range(16)
+]
+
+
+def _grid_index(value: float, minimum: float, cell: float) -> int:
+    """Exact floor((value - minimum) / cell), clamped to the grid."""
+    index = int((value - minimum) / cell)
+    # The division may round across an edge; edges are exact, so compare
+    if value < minimum + index * cell:
+        index -= 1
+    elif value >= minimum + (index + 1) * cell:
+        index += 1
+    return max(0, min(index, DIGIPIN_GRID_SIZE - 1))
+
+
 def is_valid_digipin(digipin: str) -> bool:
     """Validate if a given digipin string is valid."""    
     return len(digipin) == 10 and bool(DIGIPIN_ALLOWED_PATTERN.fullmatch(digipin))
 
 
-def get_digipin(lat: float, lon: float) -> str:
+def format_digipin(pin: str) -> str:
+    """Insert the hyphens after the 3rd and 6th symbols of a (partial) DIGIPIN."""
+    return "-".join(part for part in (pin[:3], pin[3:6], pin[6:]) if part)
+
+
+def get_digipin(lat: float, lon: float, level: int = 10) -> str:
     """
     Encode latitude and longitude into a DIGIPIN code.
+
+    `level` (1 to 10) sets the precision; a level-k code is the first k
+    symbols of the full code, i.e. the containing cell at that level.
     """
-    if lat < BOUNDS["minLat"] or lat > BOUNDS["maxLat"]:
+    if not 1 <= level <= DIGIPIN_LEVELS:
+        raise ValueError("Level must be between 1 and 10")
+    if lat < MIN_LAT or lat > MAX_LAT:
         raise ValueError("Latitude out of range")
-    if lon < BOUNDS["minLon"] or lon > BOUNDS["maxLon"]:
+    if lon < MIN_LON or lon > MAX_LON:
         raise ValueError("Longitude out of range")
 
-    min_lat, max_lat = BOUNDS["minLat"], BOUNDS["maxLat"]
-    min_lon, max_lon = BOUNDS["minLon"], BOUNDS["maxLon"]
-    digipin = ""
+    # Level-10 row (from the north edge) and column, then two levels per lookup
+    row_index = DIGIPIN_GRID_SIZE - 1 - _grid_index(lat, MIN_LAT, _LAT_CELL)
+    col_index = _grid_index(lon, MIN_LON, _LON_CELL)
+    pin = "".join([
+        DIGIPIN_PAIR_SYMBOLS[((row_index >> shift) & 15) << 4 | ((col_index >> shift) & 15)]
+        for shift in (16, 12, 8, 4, 0)
+    ])
+    if level == DIGIPIN_LEVELS:
+        return pin[:3] + "-" + pin[3:6] + "-" + pin[6:]
+    return format_digipin(pin[:level])
+
+
+def digipin_to_cell(digipin: str) -> tuple:
+    """
+    Convert a DIGIPIN or 1 to 10 symbol prefix into `(row_index, col_index,
+    level)`: the cell's row (from the north edge) and column in the 4**level
+    by 4**level grid of that level.
+    """
+    pin = digipin.replace("-", "")
+    if not 1 <= len(pin) <= DIGIPIN_LEVELS:
+        raise ValueError("Invalid DIGIPIN length")
+
+    row_index = col_index = 0
+    for char in pin:
+        position = DIGIPIN_SYMBOL_POSITIONS.get(char)
+        if position is None:
+            raise ValueError(f"Invalid character in DIGIPIN: {char}")
+        row_index = (row_index << 2) | position[0]
+        col_index = (col_index << 2) | position[1]
+    return row_index, col_index, len(pin)
+
+
+def cell_to_digipin(row_index: int, col_index: int, level: int) -> str:
+    """Inverse of `digipin_to_cell`: the hyphenated code of a grid cell."""
+    size = 4 ** level
+    if not (0 <= row_index < size and 0 <= col_index < size):
+        raise ValueError("Cell outside the DIGIPIN grid")
+    symbols = [
+        DIGIPIN_GRID[(row_index >> shift) & 3][(col_index >> shift) & 3]
+        for shift in range(2 * (level - 1), -1, -2)
+    ]
+    return format_digipin("".join(symbols))
+
 
-    for level in range(1, 11):
-        lat_div = (max_lat - min_lat) / 4
-        lon_div = (max_lon - min_lon) / 4
+# Neighbor offsets as (row, col) steps, clockwise from north; rows grow southward
+NEIGHBOR_OFFSETS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
 
-        row = 3 - int((lat - min_lat) / lat_div)
-        col = int((lon - min_lon) / lon_div)
 
-        row = max(0, min(row, 3))
-        col = max(0, min(col, 3))
+def get_digipin_neighbors(digipin: str) -> list:
+    """
+    Return the codes of the up to 8 cells around a DIGIPIN (or prefix) at the
+    same level, clockwise from north. Cells beyond the edge of `BOUNDS` do
+    not exist, so edge and corner cells have 5 and 3 neighbors.
+    """
+    row_index, col_index, level = digipin_to_cell(digipin)
+    size = 4 ** level
+    return [
+        cell_to_digipin(row_index + d_row, col_index + d_col, level)
+        for d_row, d_col in NEIGHBOR_OFFSETS
+        if 0 <= row_index + d_row < size and 0 <= col_index + d_col < size
+    ]
 
-        digipin += DIGIPIN_GRID[row][col]
 
-        if level == 3 or level == 6:
-            digipin += "-"
+def get_digipin_k_ring(digipin: str, k: int) -> list:
+    """
+    Return every cell within `k` steps of a DIGIPIN (or prefix), the cell
+    itself included, at the same level: the (2k+1) x (2k+1) block clipped to
+    `BOUNDS`, in row-major order from the north-west corner.
+    """
+    if k < 0:
+        raise ValueError("k must be non-negative")
+    row_index, col_index, level = digipin_to_cell(digipin)
+    last = 4 ** level - 1
+    return [
+        cell_to_digipin(row, col, level)
+        for row in range(max(0, row_index - k), min(last, row_index + k) + 1)
+        for col in range(max(0, col_index - k), min(last, col_index + k) + 1)
+    ]
+
+
+def get_digipin_bounds(digipin: str) -> dict:
+    """
+    Return the exact bounding box of the cell named by a DIGIPIN or any
+    1 to 10 symbol prefix of one, keyed like `BOUNDS`.
+    """
+    row_index, col_index, level = digipin_to_cell(digipin)
+    lat_div, lon_div = DIGIPIN_LEVEL_CELL_SIZES[level - 1]
+    max_lat = MAX_LAT - lat_div * row_index
+    min_lon = MIN_LON + lon_div * col_index
+    return {
+        "minLat": max_lat - lat_div,
+        "maxLat": max_lat,
+        "minLon": min_lon,
+        "maxLon": min_lon + lon_div
+    }
 
-        max_lat = min_lat + lat_div * (4 - row)
-        min_lat = min_lat + lat_div * (3 - row)
-        min_lon = min_lon + lon_div * col
-        max_lon = min_lon + lon_div
 
-    return digipin
+def is_point_in_digipin(lat: float, lon: float, digipin: str) -> bool:
+    """
+    Check whether a coordinate falls in the cell of a DIGIPIN or prefix,
+    using the same edge rules as encoding (a point on a shared edge belongs
+    to the cell that `get_digipin` assigns it to).
+    """
+    pin = digipin.replace("-", "")
+    if not 1 <= len(pin) <= DIGIPIN_LEVELS:
+        raise ValueError("Invalid DIGIPIN length")
+    if lat < MIN_LAT or lat > MAX_LAT or lon < MIN_LON or lon > MAX_LON:
+        return False
+    return get_digipin(lat, lon, len(pin)).replace("-", "") == pin
 
 
 def get_lat_lng_from_digipin(digipin: str) -> dict:
@@ -76,39 +223,221 @@ def get_lat_lng_from_digipin(digipin: str) -> dict:
     if len(pin) != 10:
         raise ValueError("Invalid DIGIPIN length")
 
-    min_lat, max_lat = BOUNDS["minLat"], BOUNDS["maxLat"]
-    min_lon, max_lon = BOUNDS["minLon"], BOUNDS["maxLon"]
+    max_lat, min_lon = MAX_LAT, MIN_LON
+
+    for char, (lat_div, lon_div) in zip(pin, DIGIPIN_LEVEL_CELL_SIZES):
+        position = DIGIPIN_SYMBOL_POSITIONS.get(char)
+        if position is None:
+            raise ValueError(f"Invalid character in DIGIPIN: {char}")
+
+        max_lat -= lat_div * position[0]
+        min_lon += lon_div * position[1]
 
+    return {
+        "latitude": round(max_lat - lat_div / 2, 6),
+        "longitude": round(min_lon + lon_div / 2, 6)
+    }
+
+# Lookup tables for the vectorized codec: (level digit counted from the
+# south edge * 4 + column) -> ASCII byte, and ASCII byte -> grid cell
+# (row * 4 + col), -1 for anything that is not a DIGIPIN symbol
+_DIGIT_BYTES = np.frombuffer("".join("".join(row) for row in DIGIPIN_GRID[::-1]).encode("ascii"), dtype=np.uint8)
+_BYTE_TO_CELL = np.full(256, -1, dtype=np.int8)
+_BYTE_TO_CELL[np.frombuffer("".join("".join(row) for row in DIGIPIN_GRID).encode("ascii"), dtype=np.uint8)] = np.arange(16)
+
+
+def encode_many(lats, lons):
+    """
+    Encode arrays of latitudes and longitudes into DIGIPIN codes.
+
+    Runs the same 10-level subdivision as `get_digipin`, one level at a time
+    over whole arrays, so every valid row gives exactly the scalar result.
+
+    Returns a tuple `(codes, valid)`: `codes` is an array of hyphenated
+    DIGIPIN strings ("" for invalid rows) and `valid` is a boolean mask that
+    is False for rows that are NaN or outside `BOUNDS`.
+    """
+    lat = np.array(lats, dtype=np.float64).ravel()
+    lon = np.array(lons, dtype=np.float64).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError("lats and lons must have the same length")
+
+    valid = (
+        (lat >= BOUNDS["minLat"]) & (lat <= BOUNDS["maxLat"])
+        & (lon >= BOUNDS["minLon"]) & (lon <= BOUNDS["maxLon"])
+    )
+    # Park invalid rows on a valid coordinate so the arithmetic stays finite
+    lat[~valid] = BOUNDS["minLat"]
+    lon[~valid] = BOUNDS["minLon"]
+
+    n = lat.shape[0]
+    min_lat = np.full(n, BOUNDS["minLat"])
+    min_lon = np.full(n, BOUNDS["minLon"])
+    lat_div = BOUNDS["maxLat"] - BOUNDS["minLat"]
+    lon_div = BOUNDS["maxLon"] - BOUNDS["minLon"]
+    scratch = np.empty(n)
+    out = np.full((n, 12), ord("-"), dtype=np.uint8)
+
+    # Cell edges are multiples of 36 / 4**10 and therefore exact in binary, so
+    # the per-level division is the same constant for every row. Output columns
+    # skip the hyphens after levels 3 and 6.
+    for column in (0, 1, 2, 4, 5, 6, 8, 9, 10, 11):
+        lat_div /= 4
+        lon_div /= 4
+
+        # Digits count cells from the south/west edge: row = 3 - lat_digit
+        np.subtract(lat, min_lat, out=scratch)
+        scratch /= lat_div
+        lat_digit = np.clip(scratch.astype(np.int8), 0, 3)
+        np.subtract(lon, min_lon, out=scratch)
+        scratch /= lon_div
+        lon_digit = np.clip(scratch.astype(np.int8), 0, 3)
+
+        out[:, column] = _DIGIT_BYTES[lat_digit * 4 + lon_digit]
+
+        min_lat += lat_div * lat_digit
+        min_lon += lon_div * lon_digit
+
+    codes = out.view("S12").ravel().astype("U12")
+    codes[~valid] = ""
+    return codes, valid
+
+
+def decode_many(codes):
+    """
+    Decode an iterable of DIGIPIN codes into latitude and longitude arrays.
+
+    Hyphens are ignored, as in `get_lat_lng_from_digipin`, and every valid
+    row matches the scalar result exactly (including rounding to 6 places).
+
+    Returns a tuple `(lats, lons, valid)`; invalid rows (wrong length, an
+    unknown character, or more than `DIGIPIN_MAX_INPUT_LENGTH` characters
+    including hyphens) are NaN in `lats`/`lons` and False in `valid`.
+    """
+    # Cap the input width up front so one oversized string cannot widen the
+    # whole array; anything longer than the cap is reported invalid
+    if isinstance(codes, np.ndarray) and codes.dtype.kind == "U":
+        pins = codes.ravel()
+        lengths = np.char.str_len(pins)
+        pins = np.where(lengths <= DIGIPIN_MAX_INPUT_LENGTH, pins, "")
+        lengths[lengths > DIGIPIN_MAX_INPUT_LENGTH] = 0
+    else:
+        pins = [
+            code if isinstance(code, str) and len(code) <= DIGIPIN_MAX_INPUT_LENGTH else ""
+            for code in codes
+        ]
+        lengths = np.fromiter(map(len, pins), dtype=np.int64, count=len(pins))
+    n = len(pins)
+    points = np.array(pins, dtype=f"U{DIGIPIN_MAX_INPUT_LENGTH}").view(np.uint32)
+    points = points.reshape(n, DIGIPIN_MAX_INPUT_LENGTH)
+
+    # Only positions before each string's real length are characters. NUL and
+    # non-ASCII (clamped to 128) inside the string map to -1 in the lookup.
+    inside = np.arange(DIGIPIN_MAX_INPUT_LENGTH) < lengths[:, None]
+    chars = np.minimum(points, 128).astype(np.uint8)
+
+    keep = (chars != ord("-")) & inside
+    valid = np.count_nonzero(keep, axis=1) == 10
+    keep &= valid[:, None]
+    cells = np.zeros((n, 10), dtype=np.int8)
+    cells[valid] = _BYTE_TO_CELL[chars[keep]].reshape(-1, 10)
+    valid &= (cells >= 0).all(axis=1)
+    cells[~valid] = 0
+
+    # Row and column indices of the level-10 cell, counted from the north and
+    # west edges. Edges are exact binary multiples of the level-10 cell size,
+    # so one multiplication gives the same value as the level-by-level loop.
+    cells = cells.T.astype(np.int32)
+    lat_index = np.zeros(n, dtype=np.int32)
+    lon_index = np.zeros(n, dtype=np.int32)
+    for level in range(10):
+        lat_index <<= 2
+        lat_index += cells[level] >> 2
+        lon_index <<= 2
+        lon_index += cells[level] & 3
+
+    lat_div = (BOUNDS["maxLat"] - BOUNDS["minLat"]) / 4 ** 10
+    lon_div = (BOUNDS["maxLon"] - BOUNDS["minLon"]) / 4 ** 10
+    lats = np.round(BOUNDS["maxLat"] - lat_div * lat_index - lat_div / 2, 6)
+    lons = np.round(BOUNDS["minLon"] + lon_div * lon_index + lon_div / 2, 6)
+    lats[~valid] = np.nan
+    lons[~valid] = np.nan
+    return lats, lons, valid
+
+
+def digipin_to_int(digipin: str) -> int:
+    """Pack a 10-symbol DIGIPIN (hyphens optional) into a 40-bit integer."""
+    pin = digipin.replace("-", "")
+    if len(pin) != DIGIPIN_LEVELS:
+        raise ValueError("Invalid DIGIPIN length")
+    value = 0
     for char in pin:
-        found = False
-        for r in range(4):
-            for c in range(4):
-                if DIGIPIN_GRID[r][c] == char:
-                    ri, ci = r, c
-                    found = True
-                    break
-            if found:
-                break
-
-        if not found:
+        cell = _SYMBOL_TO_CELL.get(char)
+        if cell is None:
             raise ValueError(f"Invalid character in DIGIPIN: {char}")
+        value = (value << 4) | cell
+    return value
 
-        lat_div = (max_lat - min_lat) / 4
-        lon_div = (max_lon - min_lon) / 4
 
-        lat1 = max_lat - lat_div * (ri + 1)
-        lat2 = max_lat - lat_div * ri
-        lon1 = min_lon + lon_div * ci
-        lon2 = min_lon + lon_div * (ci + 1)
+def int_to_digipin(value: int) -> str:
+    """Unpack a 40-bit integer from `digipin_to_int` into the hyphenated DIGIPIN."""
+    if not 0 <= value < 1 << (4 * DIGIPIN_LEVELS):
+        raise ValueError("Packed DIGIPIN out of range")
+    symbols = [_SYMBOLS[(value >> shift) & 15] for shift in range(36, -1, -4)]
+    return "".join(symbols[:3]) + "-" + "".join(symbols[3:6]) + "-" + "".join(symbols[6:])
 
-        min_lat, max_lat = lat1, lat2
-        min_lon, max_lon = lon1, lon2
 
+def latlng_to_grid(lat: float, lon: float) -> tuple:
+    """
+    Map a coordinate to its level-10 grid indices `(lat_index, lon_index)`,
+    counted from the south-west corner of `BOUNDS` (0 to 4**10 - 1 each).
+    """
+    if lat < BOUNDS["minLat"] or lat > BOUNDS["maxLat"]:
+        raise ValueError("Latitude out of range")
+    if lon < BOUNDS["minLon"] or lon > BOUNDS["maxLon"]:
+        raise ValueError("Longitude out of range")
+    return (
+        _grid_index(lat, BOUNDS["minLat"], _LAT_CELL),
+        _grid_index(lon, BOUNDS["minLon"], _LON_CELL),
+    )
+
+
+def grid_to_int(lat_index: int, lon_index: int) -> int:
+    """Interleave level-10 grid indices into the packed DIGIPIN integer."""
+    row_index = DIGIPIN_GRID_SIZE - 1 - lat_index
+    value = 0
+    for shift in range(2 * (DIGIPIN_LEVELS - 1), -1, -2):
+        value = (value << 4) | (((row_index >> shift) & 3) << 2) | ((lon_index >> shift) & 3)
+    return value
+
+
+def int_to_grid(value: int) -> tuple:
+    """Split a packed DIGIPIN integer back into `(lat_index, lon_index)`."""
+    row_index = lon_index = 0
+    for shift in range(4 * (DIGIPIN_LEVELS - 1), -1, -4):
+        cell = (value >> shift) & 15
+        row_index = (row_index << 2) | (cell >> 2)
+        lon_index = (lon_index << 2) | (cell & 3)
+    return DIGIPIN_GRID_SIZE - 1 - row_index, lon_index
+
+
+def encode_int(lat: float, lon: float) -> int:
+    """Encode a coordinate straight to the packed DIGIPIN integer."""
+    return grid_to_int(*latlng_to_grid(lat, lon))
+
+
+def decode_int(value: int) -> dict:
+    """
+    Decode a packed DIGIPIN integer to the center of its cell, with the same
+    result as `get_lat_lng_from_digipin` on the equivalent string.
+    """
+    lat_index, lon_index = int_to_grid(value)
     return {
-        "latitude": round((min_lat + max_lat) / 2, 6),
-        "longitude": round((min_lon + max_lon) / 2, 6)
+        "latitude": round(BOUNDS["minLat"] + _LAT_CELL * lat_index + _LAT_CELL / 2, 6),
+        "longitude": round(BOUNDS["minLon"] + _LON_CELL * lon_index + _LON_CELL / 2, 6)
     }
 
+
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
@@ -117,6 +446,27 @@ def haversine(lat1, lon1, lat2, lon2):
     a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)) * 1000
 
+
+def haversine_many(lats1, lons1, lats2, lons2) -> np.ndarray:
+    """Vectorized `haversine` in meters, element-wise with NumPy broadcasting."""
+    phi1 = np.radians(np.asarray(lats1, dtype=np.float64))
+    phi2 = np.radians(np.asarray(lats2, dtype=np.float64))
+    lambda1 = np.radians(np.asarray(lons1, dtype=np.float64))
+    lambda2 = np.radians(np.asarray(lons2, dtype=np.float64))
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin((lambda2 - lambda1) / 2) ** 2
+    return 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) * 1000
+
+
+def haversine_matrix(lats1, lons1, lats2, lons2) -> np.ndarray:
+    """
+    Distances in meters between every point of the first set (rows) and
+    every point of the second set (columns).
+    """
+    return haversine_many(
+        np.asarray(lats1, dtype=np.float64)[:, None], np.asarray(lons1, dtype=np.float64)[:, None],
+        np.asarray(lats2, dtype=np.float64)[None, :], np.asarray(lons2, dtype=np.float64)[None, :]
+    )
+
 def generate_qr_content(digipin: str,fmt: str = "json") -> str:    
     try:
         result= get_lat_lng_from_digipin(digipin)
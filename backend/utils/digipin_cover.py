@@ -0,0 +1,156 @@
+#backend/utils/digipin_cover.py
+"""
+Cover a bounding box or polygon with a compact set of DIGIPIN prefixes.
+
+Codes that share a prefix are contiguous both as hyphenated strings and as
+packed integers, so a cover turns a spatial filter into a handful of
+`LIKE 'prefix%'` or `BETWEEN lo AND hi` range scans on a B-tree index.
+Geometry is planar in lat/lng degrees, which is how DIGIPIN cells are cut.
+"""
+import heapq
+
+from utils.digipin import (
+    BOUNDS, DIGIPIN_LEVELS, DIGIPIN_GRID, format_digipin, get_digipin_bounds, digipin_to_int
+)
+
+_SYMBOLS = [symbol for row in DIGIPIN_GRID for symbol in row]
+
+
+def digipin_prefix_range(prefix: str) -> tuple:
+    """
+    Return the half-open packed-integer range `[lo, hi)` of all full codes
+    that start with `prefix` (see `utils.digipin.digipin_to_int`).
+    """
+    pin = prefix.replace("-", "")
+    shift = 4 * (DIGIPIN_LEVELS - len(pin))
+    low = digipin_to_int(pin + _SYMBOLS[0] * (DIGIPIN_LEVELS - len(pin)))
+    return low, low + (1 << shift)
+
+
+def _point_in_polygon(lat: float, lon: float, polygon: list) -> bool:
+    """Even-odd ray casting test; `polygon` is a list of (lat, lon) vertices."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _segment_hits_box(a: tuple, b: tuple, box: dict) -> bool:
+    """Liang-Barsky clip: does segment a-b touch the closed box?"""
+    (lat0, lon0), (lat1, lon1) = a, b
+    d_lat, d_lon = lat1 - lat0, lon1 - lon0
+    t0, t1 = 0.0, 1.0
+    for p, q in (
+        (-d_lon, lon0 - box["minLon"]), (d_lon, box["maxLon"] - lon0),
+        (-d_lat, lat0 - box["minLat"]), (d_lat, box["maxLat"] - lat0),
+    ):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return False
+    return True
+
+
+def _classify_box(box: dict, region: dict):
+    """Return None (outside), False (partly inside) or True (fully inside)."""
+    if (box["maxLat"] < region["minLat"] or box["minLat"] > region["maxLat"]
+            or box["maxLon"] < region["minLon"] or box["minLon"] > region["maxLon"]):
+        return None
+    return (region["minLat"] <= box["minLat"] and box["maxLat"] <= region["maxLat"]
+            and region["minLon"] <= box["minLon"] and box["maxLon"] <= region["maxLon"])
+
+
+def _classify_polygon(box: dict, polygon: list, extent: dict):
+    """Return None (outside), False (partly inside) or True (fully inside)."""
+    if _classify_box(box, extent) is None:
+        return None
+    edges = list(zip(polygon, polygon[1:] + polygon[:1]))
+    if any(_segment_hits_box(a, b, box) for a, b in edges):
+        return False
+    # No edge touches the cell, so it is entirely inside or entirely outside
+    return True if _point_in_polygon(box["minLat"], box["minLon"], polygon) else None
+
+
+def _cover(classify, max_cells: int, max_level: int) -> list:
+    if not 1 <= max_level <= DIGIPIN_LEVELS:
+        raise ValueError("max_level must be between 1 and 10")
+    if max_cells < 1:
+        raise ValueError("max_cells must be at least 1")
+
+    def children(pin):
+        found = []
+        for symbol in _SYMBOLS:
+            child = pin + symbol
+            full = classify(get_digipin_bounds(child))
+            if full is not None:
+                found.append((child, full))
+        return found
+
+    cells = dict(children(""))
+    # Split the largest (lowest level) partial cells first
+    queue = [(len(pin), pin) for pin, full in cells.items() if not full]
+    heapq.heapify(queue)
+    while queue:
+        level, pin = heapq.heappop(queue)
+        if level >= max_level:
+            continue
+        split = children(pin)
+        if len(cells) - 1 + len(split) > max_cells:
+            continue
+        del cells[pin]
+        for child, full in split:
+            cells[child] = full
+            if not full:
+                heapq.heappush(queue, (len(child), child))
+
+    return [
+        {"prefix": format_digipin(pin), "full": full}
+        for pin, full in sorted(cells.items(), key=lambda item: digipin_prefix_range(item[0]))
+    ]
+
+
+def cover_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+               max_cells: int = 64, max_level: int = DIGIPIN_LEVELS) -> list:
+    """
+    Cover a lat/lng bounding box with DIGIPIN prefixes.
+
+    Returns a list of `{"prefix": ..., "full": bool}` sorted by code order,
+    where `full` is True if the cell lies entirely inside the box. Partial
+    cells are split, coarsest first, until another split would exceed
+    `max_cells` or reach below `max_level`. The 16 level-1 cells are the
+    coarsest possible, so a region touching more of them than `max_cells`
+    still gets one prefix per level-1 cell.
+    """
+    region = {"minLat": min_lat, "maxLat": max_lat, "minLon": min_lon, "maxLon": max_lon}
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("Bounding box minimum exceeds maximum")
+    return _cover(lambda box: _classify_box(box, region), max_cells, max_level)
+
+
+def cover_polygon(polygon: list, max_cells: int = 64, max_level: int = DIGIPIN_LEVELS) -> list:
+    """
+    Cover a simple polygon, given as a list of (lat, lon) vertices, with
+    DIGIPIN prefixes. Same result shape and limits as `cover_bbox`.
+    """
+    if len(polygon) < 3:
+        raise ValueError("Polygon needs at least 3 vertices")
+    polygon = [(float(lat), float(lon)) for lat, lon in polygon]
+    extent = {
+        "minLat": min(lat for lat, _ in polygon), "maxLat": max(lat for lat, _ in polygon),
+        "minLon": min(lon for _, lon in polygon), "maxLon": max(lon for _, lon in polygon),
+    }
+    return _cover(lambda box: _classify_polygon(box, polygon, extent), max_cells, max_level)
@@ -0,0 +1,75 @@
+#backend/utils/digipin_knn.py
+"""
+k-nearest-neighbor search over decoded DIGIPIN coordinates.
+
+Points are bucketed into a uniform lat/lng grid sized so that a cell holds
+about k points, the same way DIGIPIN cells partition the map. Each occupied
+cell then only compares its points against a growing ring of surrounding
+cells, until the ring is wide enough to guarantee that nothing outside it
+can be closer. Work and memory are O(n * k) for reasonably spread points.
+"""
+import math
+
+import numpy as np
+
+from utils.digipin import haversine_matrix
+
+EARTH_RADIUS_M = 6371000
+
+
+def nearest_neighbors(lats, lons, k: int) -> tuple:
+    """
+    Return `(indices, distances)` for the `k` nearest other points of every
+    point, nearest first: two (n, k) int32 arrays, distances in whole
+    meters (haversine, truncated). `k` is capped at n - 1.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n = len(lats)
+    k = max(0, min(k, n - 1))
+    indices = np.zeros((n, k), dtype=np.int32)
+    distances = np.zeros((n, k), dtype=np.int32)
+    if k == 0:
+        return indices, distances
+
+    min_lat, min_lon = lats.min(), lons.min()
+    span = max(lats.max() - min_lat, 1e-9) * max(lons.max() - min_lon, 1e-9)
+    cell = max(math.sqrt(span * k / n), 1e-9)
+    rows = ((lats - min_lat) / cell).astype(np.int64)
+    cols = ((lons - min_lon) / cell).astype(np.int64)
+    n_rows, n_cols = int(rows.max()) + 1, int(cols.max()) + 1
+
+    order = np.argsort(rows * n_cols + cols, kind="stable")
+    keys, starts, counts = np.unique((rows * n_cols + cols)[order], return_index=True, return_counts=True)
+    buckets = {key: order[start:start + count] for key, start, count in zip(keys.tolist(), starts, counts)}
+
+    # A ring of r cells around a point's own cell contains every point less
+    # than r cells away in each direction; east-west cells are narrowest at
+    # the highest latitude in the set
+    cos_lat = math.cos(math.radians(np.abs(lats).max()))
+    ring_meters = EARTH_RADIUS_M * math.radians(cell) * cos_lat * 0.999
+    max_ring = max(n_rows, n_cols)
+
+    for key, members in buckets.items():
+        row, col = divmod(key, n_cols)
+        ring = 1
+        while True:
+            candidates = np.concatenate([
+                buckets[r * n_cols + c]
+                for r in range(max(0, row - ring), min(n_rows, row + ring + 1))
+                for c in range(max(0, col - ring), min(n_cols, col + ring + 1))
+                if r * n_cols + c in buckets
+            ])
+            if len(candidates) > k or ring >= max_ring:
+                d = haversine_matrix(lats[members], lons[members], lats[candidates], lons[candidates])
+                d[members[:, None] == candidates[None, :]] = np.inf
+                nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+                nearest_d = np.take_along_axis(d, nearest, axis=1)
+                if ring >= max_ring or nearest_d.max() <= ring * ring_meters:
+                    by_distance = np.argsort(nearest_d, axis=1, kind="stable")
+                    indices[members] = candidates[np.take_along_axis(nearest, by_distance, axis=1)]
+                    distances[members] = np.take_along_axis(nearest_d, by_distance, axis=1)
+                    break
+            ring += 1
+
+    return indices, distances
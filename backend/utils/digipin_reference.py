@@ -0,0 +1,85 @@
+#backend/utils/digipin_reference.py
+"""
+The original loop-based DIGIPIN codec, kept unchanged as the reference that
+the table-driven, vectorized and integer codec paths are benchmarked and
+differentially tested against. Not used on any request path.
+"""
+from utils.digipin import DIGIPIN_GRID, BOUNDS
+
+
+def reference_get_digipin(lat: float, lon: float) -> str:
+    """
+    Encode latitude and longitude into a DIGIPIN code.
+    """
+    if lat < BOUNDS["minLat"] or lat > BOUNDS["maxLat"]:
+        raise ValueError("Latitude out of range")
+    if lon < BOUNDS["minLon"] or lon > BOUNDS["maxLon"]:
+        raise ValueError("Longitude out of range")
+
+    min_lat, max_lat = BOUNDS["minLat"], BOUNDS["maxLat"]
+    min_lon, max_lon = BOUNDS["minLon"], BOUNDS["maxLon"]
+    digipin = ""
+
+    for level in range(1, 11):
+        lat_div = (max_lat - min_lat) / 4
+        lon_div = (max_lon - min_lon) / 4
+
+        row = 3 - int((lat - min_lat) / lat_div)
+        col = int((lon - min_lon) / lon_div)
+
+        row = max(0, min(row, 3))
+        col = max(0, min(col, 3))
+
+        digipin += DIGIPIN_GRID[row][col]
+
+        if level == 3 or level == 6:
+            digipin += "-"
+
+        max_lat = min_lat + lat_div * (4 - row)
+        min_lat = min_lat + lat_div * (3 - row)
+        min_lon = min_lon + lon_div * col
+        max_lon = min_lon + lon_div
+
+    return digipin
+
+
+def reference_get_lat_lng_from_digipin(digipin: str) -> dict:
+    """
+    Decode a DIGIPIN code into its corresponding latitude and longitude.
+    """
+    pin = digipin.replace("-", "")
+    if len(pin) != 10:
+        raise ValueError("Invalid DIGIPIN length")
+
+    min_lat, max_lat = BOUNDS["minLat"], BOUNDS["maxLat"]
+    min_lon, max_lon = BOUNDS["minLon"], BOUNDS["maxLon"]
+
+    for char in pin:
+        found = False
+        for r in range(4):
+            for c in range(4):
+                if DIGIPIN_GRID[r][c] == char:
+                    ri, ci = r, c
+                    found = True
+                    break
+            if found:
+                break
+
+        if not found:
+            raise ValueError(f"Invalid character in DIGIPIN: {char}")
+
+        lat_div = (max_lat - min_lat) / 4
+        lon_div = (max_lon - min_lon) / 4
+
+        lat1 = max_lat - lat_div * (ri + 1)
+        lat2 = max_lat - lat_div * ri
+        lon1 = min_lon + lon_div * ci
+        lon2 = min_lon + lon_div * (ci + 1)
+
+        min_lat, max_lat = lat1, lat2
+        min_lon, max_lon = lon1, lon2
+
+    return {
+        "latitude": round((min_lat + max_lat) / 2, 6),
+        "longitude": round((min_lon + max_lon) / 2, 6)
+    }